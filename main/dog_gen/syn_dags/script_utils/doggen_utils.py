@@ -91,8 +91,7 @@ class DogGenHillclimber:
             print(f"# Starting round {round}")
 
             if len(self.parts.scorer) > 100:
-                self.parts.scorer.sort_buffer()
-                old_scores = [item[1][0] for item in list(self.parts.scorer.mol_buffer.items())[:100]]
+                old_scores = [item[1][0] for item in self.parts.scorer.topk(100)]
             else:
                 old_scores = 0
 
@@ -113,8 +112,7 @@ class DogGenHillclimber:
 
             # early stopping
             if len(self.parts.scorer) > 100:
-                self.parts.scorer.sort_buffer()
-                new_scores = [item[1][0] for item in list(self.parts.scorer.mol_buffer.items())[:100]]
+                new_scores = [item[1][0] for item in self.parts.scorer.topk(100)]
                 if new_scores == old_scores:
                     patience += 1
                     if patience >= 5:
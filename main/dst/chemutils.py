@@ -88,6 +88,7 @@ def load_vocabulary():
 	return vocabulary 
 
 vocabulary = load_vocabulary()
+vocabulary_idx = {word:idx for idx,word in enumerate(vocabulary)}  ### word -> index, instead of scanning the list 
 bondtype_list = [rdkit.Chem.rdchem.BondType.SINGLE, rdkit.Chem.rdchem.BondType.DOUBLE]
 bondtype_list = [rdkit.Chem.rdchem.BondType.SINGLE]
 
@@ -97,7 +98,7 @@ def ith_substructure_is_atom(i):
     return True if len(substructure)==1 else False
 
 def word2idx(word):
-    return vocabulary.index(word)
+    return vocabulary_idx[word]
 
 
 # def smiles2fingerprint(smiles):
@@ -131,12 +132,9 @@ def similarity_matrix(smiles_lst):
     sim_matrix = np.eye(n)
     mol_lst = [Chem.MolFromSmiles(smiles) for smiles in smiles_lst]
     fingerprint_lst = [AllChem.GetMorganFingerprintAsBitVect(mol, 2, nBits=2048, useChirality=False) for mol in mol_lst]
-    for i in range(n):
-        fp1 = fingerprint_lst[i]
-        for j in range(i+1,n):
-            fp2 = fingerprint_lst[j]
-            sim = DataStructs.TanimotoSimilarity(fp1, fp2)
-            sim_matrix[i,j] = sim_matrix[j,i] = sim
+    for i in range(n - 1):
+        sims = DataStructs.BulkTanimotoSimilarity(fingerprint_lst[i], fingerprint_lst[i+1:])
+        sim_matrix[i,i+1:] = sim_matrix[i+1:,i] = sims
     return sim_matrix 
 
 
@@ -2,7 +2,7 @@ import numpy as np
 
 
 class DPPModel(object):
-    def __init__(self, smiles_lst, sim_matrix, f_scores, top_k, lamb):
+    def __init__(self, smiles_lst, sim_matrix, f_scores, top_k, lamb, log_det=False):
         self.smiles_lst = smiles_lst 
         self.sim_matrix = sim_matrix # (n,n)
         self.lamb = lamb
@@ -12,24 +12,26 @@ class DPPModel(object):
         self.kernel_matrix = self.f_scores.reshape((self.n, 1)) \
                              * sim_matrix * self.f_scores.reshape((1, self.n))
         self.log_det_V = np.sum(f_scores) * self.lamb 
-        self.log_det_S = np.log(np.linalg.det(np.mat(self.kernel_matrix)))
+        ### O(n^3) and only a diagnostic, so computed on request
+        self.log_det_S = np.linalg.slogdet(self.kernel_matrix)[1] if log_det else None
 
     def dpp(self): 
+        """
+        greedy MAP inference with incremental Cholesky updates: each iteration
+        updates the Cholesky row c and the residual variances d of all items at once
+        """
         c = np.zeros((self.max_iter, self.n))
         d = np.copy(np.diag(self.kernel_matrix))  ### diagonal
+        selected = np.zeros(self.n, dtype=bool)
         j = np.argmax(d)
         Yg = [j]
         _iter = 0
-        Z = list(range(self.n))
         while len(Yg) < self.max_iter:
-            Z_Y = set(Z).difference(set(Yg))
-            for i in Z_Y:
-                if _iter == 0:
-                    ei = self.kernel_matrix[j, i] / np.sqrt(d[j])
-                else:
-                    ei = (self.kernel_matrix[j, i] - np.dot(c[:_iter, j], c[:_iter, i])) / np.sqrt(d[j])
-                c[_iter, i] = ei
-                d[i] = d[i] - ei * ei
+            selected[j] = True
+            ei = (self.kernel_matrix[j] - c[:_iter, j] @ c[:_iter]) / np.sqrt(d[j])
+            ei[selected] = 0
+            c[_iter] = ei
+            d -= ei * ei
             d[j] = 0
             j = np.argmax(d)
             Yg.append(j)
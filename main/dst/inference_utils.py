@@ -1,6 +1,7 @@
 
 ### 1. import
 import numpy as np 
+import torch
 from tqdm import tqdm 
 from chemutils import * 
 '''
@@ -38,13 +39,13 @@ def oracle_screening(smiles_set, oracle):
 	smiles_score_lst.sort(key=lambda x:x[1], reverse=True)
 	return smiles_score_lst 
 
-def dpp(smiles_score_lst, num_return, lamb):
+def dpp(smiles_score_lst, num_return, lamb, log_det=False):
 	smiles_lst = [i[0] for i in smiles_score_lst]
 	if len(smiles_lst) <= num_return:
 		return smiles_lst, None, None 
 	score_arr = np.array([i[1] for i in smiles_score_lst])
 	sim_mat = similarity_matrix(smiles_lst)
-	dpp_model = DPPModel(smiles_lst = smiles_lst, sim_matrix = sim_mat, f_scores = score_arr, top_k = num_return, lamb = lamb)
+	dpp_model = DPPModel(smiles_lst = smiles_lst, sim_matrix = sim_mat, f_scores = score_arr, top_k = num_return, lamb = lamb, log_det = log_det)
 	smiles_lst, log_det_V, log_det_S = dpp_model.dpp()
 	return smiles_lst, log_det_V, log_det_S 
 
@@ -246,6 +247,18 @@ def inference_molecule_set(input_smiles_lst, gnn, result_file, generations, popu
 
 
 
+#### state of the expansion pool workers, set by init_dst_worker when the pool starts: 
+#### forked workers inherit the gnn from the parent instead of unpickling it with every molecule 
+dst_worker_args = None 
+
+def init_dst_worker(gnn, topk, epsilon):
+	global dst_worker_args
+	torch.set_num_threads(1)  ### one process per core already 
+	dst_worker_args = (gnn, topk, epsilon)
+
+def optimize_dst_worker(smiles):
+	return optimize_dst((smiles,) + dst_worker_args)
+
 def optimize_dst(feature):
 	smiles, gnn, topk, epsilon = feature
 	if substr_num(smiles) < 3:
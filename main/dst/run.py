@@ -13,11 +13,9 @@ from chemutils import smiles2graph, vocabulary
 from online_train import train_gnn
 from random import shuffle 
 import random 
+import joblib 
 # import multiprocessing as mp
 import multiprocess as mp
-num_cores = mp.cpu_count()
-num_cores = min(num_cores, 5)
-pool = mp.Pool(num_cores)
 from time import time 
 
 device = torch.device('cpu')
@@ -51,6 +49,7 @@ class DST_Optimizer(BaseOptimizer):
 		lamb = config['lamb']
 		topk = config['topk']
 		epsilon = config['epsilon']
+		num_workers = config.get('num_workers', joblib.effective_n_jobs(self.n_jobs))
 
 		start_smiles_lst = ['C1(N)=NC=CC=N1', 'C1(C)=NC=CC=N1', 'C1(C)=CC=CC=C1', 'C1(N)=CC=CC=C1', 'CC', 'C1(C)CCCCC1']
 
@@ -82,8 +81,7 @@ class DST_Optimizer(BaseOptimizer):
 				self.save_result(self.model_name + "_" + oracle.name + "_" + str(self.seed))
 
 			if len(self.oracle) > 100:
-				self.sort_buffer()
-				old_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+				old_scores = [item[1][0] for item in self.topk(100)]
 			else:
 				old_scores = 0
 
@@ -93,10 +91,10 @@ class DST_Optimizer(BaseOptimizer):
 			########## new version, parallel 
 			t1 = time()
 			current_list = list(current_set)
-			current_list = [(i, gnn, topk, epsilon) for i in current_list]
-			results = pool.map(inference_utils.optimize_dst, current_list)
-			for i in results:
-				next_set = next_set.union(i)
+			#### a new pool every generation, so that the workers fork with the current gnn weights 
+			with mp.Pool(num_workers, initializer = inference_utils.init_dst_worker, initargs = (gnn, topk, epsilon)) as pool:
+				for smiles_set in pool.imap_unordered(inference_utils.optimize_dst_worker, current_list):
+					next_set = next_set.union(smiles_set)
 			t2 = time() 
 			print('Sampling from current state takes', str((t2-t1)/60)[:5], 'minutes') #### most time consuming 
 			########## new version, parallel 
@@ -147,8 +145,7 @@ class DST_Optimizer(BaseOptimizer):
 
 			### early stopping
 			if len(self.oracle) > 500:
-				self.sort_buffer()
-				new_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+				new_scores = [item[1][0] for item in self.topk(100)]
 				if new_scores == old_scores:
 					patience += 1
 					if patience >= self.args.patience:
@@ -487,8 +487,7 @@ class GFlowNet_AL_Optimizer(BaseOptimizer):
             i += 1
             
             if len(self.oracle) > 100:
-                self.sort_buffer()
-                old_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+                old_scores = [item[1][0] for item in self.topk(100)]
             else:
                 old_scores = 0
 
@@ -550,8 +549,7 @@ class GFlowNet_AL_Optimizer(BaseOptimizer):
 
             # early stopping
             if len(self.oracle) > 100:
-                self.sort_buffer()
-                new_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+                new_scores = [item[1][0] for item in self.topk(100)]
                 if new_scores == old_scores:
                     patience += 1
                     if patience >= self.args.patience:
@@ -1,7 +1,9 @@
 """ Code for molecular fingerprints """
 
+import collections
 import functools
 
+import joblib
 import numpy as np
 from rdkit import Chem
 from rdkit.Chem import rdMolDescriptors
@@ -25,3 +27,114 @@ def smiles_to_fp_array(smiles: str, fingerprint_func: callable = None) -> np.arr
     mol = Chem.MolFromSmiles(smiles)
     fp = fingerprint_func(mol)
     return _fp_to_array(fp).flatten()
+
+
+
+def pack_fp_array(fp_arr: np.array) -> np.array:
+    """Pack a 0/1 fingerprint array (last axis) into int64 words, 64x smaller than float64"""
+    packed = np.packbits(np.asarray(fp_arr, dtype=np.uint8), axis=-1)
+    n_pad = (-packed.shape[-1]) % 8
+    if n_pad > 0:
+        pad_width = [(0, 0)] * (packed.ndim - 1) + [(0, n_pad)]
+        packed = np.pad(packed, pad_width)
+    return np.ascontiguousarray(packed).view("<i8")
+
+
+def smiles_to_packed_fp_array(smiles: str, fingerprint_func: callable = None) -> np.array:
+    """Convert individual SMILES into a 1D bit-packed int64 fingerprint array"""
+    return pack_fp_array(smiles_to_fp_array(smiles, fingerprint_func=fingerprint_func))
+
+
+def _morgan_fp_arrays(smiles_list: list, radius: int, n_bits: int, packed: bool) -> list:
+    """Morgan fingerprint arrays for a chunk of SMILES (module level so joblib workers can pickle it)"""
+    fingerprint_func = functools.partial(
+        rdMolDescriptors.GetMorganFingerprintAsBitVect, radius=radius, nBits=n_bits
+    )
+    to_array = smiles_to_packed_fp_array if packed else smiles_to_fp_array
+    return [to_array(s, fingerprint_func=fingerprint_func) for s in smiles_list]
+
+
+class FingerprintCache:
+    """
+    Bounded LRU store of Morgan fingerprint arrays keyed by SMILES as given.
+    Keys are not canonicalized here: callers pass canonical SMILES (the oracle buffer, 
+    the GA's output and the canonicalized starting population), so a molecule is 
+    fingerprinted once however many times it is proposed.
+    """
+
+    def __init__(
+        self,
+        radius: int = 2,
+        n_bits: int = 1024,
+        packed: bool = False,
+        maxsize: int = 200000,
+        n_jobs: int = 1,
+        min_parallel: int = 2048,
+    ):
+        """
+        :param radius: Morgan fingerprint radius
+        :param n_bits: Morgan fingerprint length
+        :param packed: store bit-packed int64 arrays instead of 0/1 arrays
+        :param maxsize: maximum number of fingerprints kept, least recently used are evicted
+        :param n_jobs: joblib workers used for batches of misses
+        :param min_parallel: smallest number of misses worth sending to workers
+        """
+        self.radius = radius
+        self.n_bits = n_bits
+        self.packed = packed
+        self.maxsize = maxsize
+        self.n_jobs = n_jobs
+        self.min_parallel = min_parallel
+        self._cache = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, smiles):
+        return smiles in self._cache
+
+    def __call__(self, smiles: str) -> np.array:
+        """Fingerprint array of a single SMILES (same signature as smiles_to_fp_array)"""
+        return self.batch([smiles])[0]
+
+    def _compute(self, smiles_list: list) -> list:
+        n_jobs = joblib.effective_n_jobs(self.n_jobs)
+        if n_jobs <= 1 or len(smiles_list) < self.min_parallel:
+            return _morgan_fp_arrays(smiles_list, self.radius, self.n_bits, self.packed)
+        chunks = [smiles_list[i::n_jobs] for i in range(n_jobs)]
+        results = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(_morgan_fp_arrays)(chunk, self.radius, self.n_bits, self.packed)
+            for chunk in chunks
+        )
+        # Undo the strided split
+        fps = [None] * len(smiles_list)
+        for i, chunk_fps in enumerate(results):
+            fps[i::n_jobs] = chunk_fps
+        return fps
+
+    def batch(self, smiles_list: list) -> list:
+        """Fingerprint arrays of a list of SMILES, computing all misses in one (parallel) batch"""
+        misses = list(dict.fromkeys(s for s in smiles_list if s not in self._cache))
+        self.hits += len(smiles_list) - len(misses)
+        self.misses += len(misses)
+        computed = dict(zip(misses, self._compute(misses))) if len(misses) > 0 else {}
+
+        out = []
+        for s in smiles_list:
+            fp = computed.get(s)
+            if fp is None:
+                fp = self._cache[s]
+                self._cache.move_to_end(s)
+            out.append(fp)
+        for s, fp in computed.items():
+            self._cache[s] = fp
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return out
+
+    def stack(self, smiles_list: list, dtype=None) -> np.array:
+        """Fingerprints of a list of SMILES stacked into a 2D array"""
+        fp_array = np.stack(self.batch(smiles_list))
+        return fp_array if dtype is None else fp_array.astype(dtype)
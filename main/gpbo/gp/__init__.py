@@ -3,4 +3,5 @@ from .gp_utils import (
     fit_gp_hyperparameters,
     batch_predict_mu_var_numpy,
     transfer_gp_hyperparameters,
+    select_inducing_points,
 )
@@ -7,7 +7,7 @@ from gpytorch.models import ExactGP
 from gpytorch.mlls import ExactMarginalLogLikelihood
 import botorch
 
-from .tanimoto_gp import TanimotoGP
+from .tanimoto_gp import TanimotoGP, popcount
 
 
 def batch_predict_mu_var_numpy(
@@ -20,6 +20,15 @@ def batch_predict_mu_var_numpy(
     gp_model.eval()
     mu = []
     var = []
+    if getattr(gp_model, "incremental", False):
+        for batch_start in range(0, len(x), batch_size):
+            batch_end = batch_start + batch_size
+            mu_batch, var_batch = gp_model.incremental_predict(
+                x[batch_start:batch_end], include_var=include_var
+            )
+            mu.append(mu_batch.detach().cpu().numpy())
+            var.append(var_batch.detach().cpu().numpy())
+        return np.concatenate(mu, axis=0), np.concatenate(var, axis=0)
     with gpytorch.settings.fast_computations(False, False, False), torch.no_grad():
         for batch_start in range(0, len(x), batch_size):
             batch_end = batch_start + batch_size
@@ -36,6 +45,35 @@ def batch_predict_mu_var_numpy(
     return mu, var
 
 
+def select_inducing_points(x: torch.Tensor, num_points: int, start: int = 0):
+    """
+    Greedy k-center selection of inducing points in Tanimoto distance: each new point is
+    the one farthest from all points chosen so far. Costs O(n m) similarity evaluations
+    and works on dense 0/1 or bit-packed int64 fingerprints.
+    Returns the sorted indices of the selected rows of x.
+    """
+    packed = not x.dtype.is_floating_point
+    x_sum = popcount(x).sum(dim=-1) if packed else x.sum(dim=-1)
+    min_dist = torch.full((len(x),), float("inf"), dtype=torch.float64)
+    idxs = [start]
+    with torch.no_grad():
+        while True:
+            center = x[idxs[-1]]
+            if packed:
+                inter = popcount(x & center).sum(dim=-1)
+            else:
+                inter = x @ center
+            sim = inter / (x_sum + x_sum[idxs[-1]] - inter).clamp_min(1)
+            min_dist = torch.minimum(min_dist, 1.0 - sim.to(min_dist.dtype))
+            if len(idxs) >= min(num_points, len(x)):
+                break
+            i = int(torch.argmax(min_dist))
+            if min_dist[i] <= 0:
+                break  # only duplicates of chosen points remain
+            idxs.append(i)
+    return sorted(idxs)
+
+
 def fit_gp_hyperparameters(gp_model: ExactGP):
     """Optimize train MLL to fit GP hyperparameters"""
 
@@ -4,6 +4,7 @@ import torch
 import gpytorch
 from gpytorch.kernels import ScaleKernel, Kernel, InducingPointKernel
 from gpytorch.models import ExactGP
+from gpytorch.utils.cholesky import psd_safe_cholesky
 import botorch
 
 
@@ -16,6 +17,55 @@ def batch_tanimoto_sim(x1: torch.Tensor, x2: torch.Tensor):
     return (dot_prod) / (x1_sum + torch.transpose(x2_sum, -1, -2) - dot_prod)
 
 
+def popcount(x: torch.Tensor):
+    """number of set bits of each int64 word (SWAR bit counting)"""
+    x = x - ((x >> 1) & 0x5555555555555555)
+    x = (x & 0x3333333333333333) + ((x >> 2) & 0x3333333333333333)
+    x = (x + (x >> 4)) & 0x0F0F0F0F0F0F0F0F
+    return (x * 0x0101010101010101) >> 56
+
+
+def unpack_fp(x: torch.Tensor, dtype=None):
+    """
+    bit-packed int64 fingerprints -> dense 0/1 fingerprints; the bit order is permuted
+    the same way for every fingerprint, so dot products are unchanged
+    """
+    shifts = torch.arange(64, device=x.device)
+    bits = (x.unsqueeze(-1) >> shifts) & 1
+    return bits.flatten(-2).to(dtype or torch.get_default_dtype())
+
+
+def batch_tanimoto_sim_packed(x1: torch.Tensor, x2: torch.Tensor, chunk_size: int = 2048):
+    """
+    tanimoto between two batched tensors of bit-packed int64 fingerprints, across last 2 dimensions.
+    Bit counts come from popcount on the packed words; intersections are computed with
+    matmuls over chunks unpacked on the fly, so only chunk_size dense rows exist at a time.
+    The 0/1 matmuls run in float32, which counts exactly up to 2^24 bits.
+    """
+    assert x1.ndim >= 2 and x2.ndim >= 2
+    dtype = torch.get_default_dtype()
+    x1_sum = popcount(x1).sum(dim=-1, keepdim=True).to(dtype)
+    x2_sum = torch.transpose(popcount(x2).sum(dim=-1, keepdim=True).to(dtype), -1, -2)
+    rows = []
+    for i in range(0, x1.shape[-2], chunk_size):
+        x1_dense = unpack_fp(x1[..., i:i + chunk_size, :], torch.float32)
+        cols = []
+        for j in range(0, x2.shape[-2], chunk_size):
+            x2_dense = unpack_fp(x2[..., j:j + chunk_size, :], torch.float32)
+            dot_prod = torch.matmul(x1_dense, torch.transpose(x2_dense, -1, -2)).to(dtype)
+            union = x1_sum[..., i:i + chunk_size, :] + x2_sum[..., :, j:j + chunk_size] - dot_prod
+            cols.append(dot_prod / union)
+        rows.append(torch.cat(cols, dim=-1))
+    return torch.cat(rows, dim=-2)
+
+
+def tanimoto_sim(x1: torch.Tensor, x2: torch.Tensor):
+    """tanimoto for dense 0/1 float fingerprints or bit-packed int64 fingerprints"""
+    if x1.dtype.is_floating_point:
+        return batch_tanimoto_sim(x1, x2)
+    return batch_tanimoto_sim_packed(x1, x2)
+
+
 class TanimotoKernel(Kernel):
     """Tanimoto coefficient kernel"""
 
@@ -28,10 +78,11 @@ class TanimotoKernel(Kernel):
     def forward(self, x1, x2, diag=False, **params):
         if diag:
             assert x1.size() == x2.size() and torch.equal(x1, x2)
+            dtype = x1.dtype if x1.dtype.is_floating_point else torch.get_default_dtype()
             return torch.ones(
-                *x1.shape[:-2], x1.shape[-2], dtype=x1.dtype, device=x1.device
+                *x1.shape[:-2], x1.shape[-2], dtype=dtype, device=x1.device
             )
-        return batch_tanimoto_sim(x1, x2)
+        return tanimoto_sim(x1, x2)
 
 
 class TanimotoGP(ExactGP, botorch.models.gpytorch.GPyTorchModel):
@@ -54,6 +105,79 @@ class TanimotoGP(ExactGP, botorch.models.gpytorch.GPyTorchModel):
         self.covar_module = ScaleKernel(TanimotoKernel())
         self.mean_module = gpytorch.means.ConstantMean()
 
+        # Incremental exact-GP mode: predictions use a cached Cholesky factor of
+        # K + noise * I which append_train_data extends instead of recomputing
+        self.incremental = False
+        self.chol_cache = None
+
+    def set_train_data(self, inputs=None, targets=None, strict=True):
+        # Arbitrary changes of the data need a full refactorization
+        self.chol_cache = None
+        super().set_train_data(inputs=inputs, targets=targets, strict=strict)
+
+    def _kernel(self, x1, x2):
+        return self.covar_module.outputscale * tanimoto_sim(x1, x2)
+
+    def _noise_eye(self, n, like):
+        noise = self.likelihood.noise
+        return noise * torch.eye(n, dtype=noise.dtype, device=like.device)
+
+    def refactorize(self):
+        """Full O(n^3) Cholesky factorization of the training kernel matrix"""
+        x = self.train_inputs[0]
+        y = self.train_targets
+        with torch.no_grad():
+            L = psd_safe_cholesky(self._kernel(x, x) + self._noise_eye(len(x), x))
+            v = torch.triangular_solve((y - self.mean_module.constant).unsqueeze(-1), L, upper=False)[0]
+            alpha = torch.triangular_solve(v, L.transpose(-1, -2), upper=True)[0]
+        self.chol_cache = dict(L=L, v=v, alpha=alpha, hparams=self.hparam_dict)
+
+    def append_train_data(self, inputs, targets):
+        """
+        Add a batch of b training points. With a valid cached factor the Cholesky
+        factor and alpha vector are extended in O(n^2 b) instead of refactorized.
+        """
+        cache = self.chol_cache
+        x_old = self.train_inputs[0]
+        if self.incremental and cache is not None and cache["hparams"] == self.hparam_dict:
+            with torch.no_grad():
+                L, v = cache["L"], cache["v"]
+                n, b = len(x_old), len(inputs)
+                L21 = torch.triangular_solve(self._kernel(x_old, inputs), L, upper=False)[0].transpose(-1, -2)
+                L22 = psd_safe_cholesky(
+                    self._kernel(inputs, inputs) + self._noise_eye(b, inputs) - L21 @ L21.transpose(-1, -2)
+                )
+                L_new = torch.zeros(n + b, n + b, dtype=L.dtype, device=L.device)
+                L_new[:n, :n] = L
+                L_new[n:, :n] = L21
+                L_new[n:, n:] = L22
+                r = (targets - self.mean_module.constant).unsqueeze(-1) - L21 @ v
+                v_new = torch.cat([v, torch.triangular_solve(r, L22, upper=False)[0]], dim=0)
+                alpha = torch.triangular_solve(v_new, L_new.transpose(-1, -2), upper=True)[0]
+            cache = dict(L=L_new, v=v_new, alpha=alpha, hparams=cache["hparams"])
+        else:
+            cache = None
+        ExactGP.set_train_data(
+            self,
+            inputs=torch.cat([x_old, inputs], dim=0),
+            targets=torch.cat([self.train_targets, targets], dim=0),
+            strict=False,
+        )
+        self.chol_cache = cache
+
+    def incremental_predict(self, x, include_var=True):
+        """Posterior mean/variance of the latent function from the cached factor"""
+        if self.chol_cache is None or self.chol_cache["hparams"] != self.hparam_dict:
+            self.refactorize()
+        with torch.no_grad():
+            k_star = self._kernel(x, self.train_inputs[0])
+            mu = self.mean_module.constant + (k_star @ self.chol_cache["alpha"]).squeeze(-1)
+            if not include_var:
+                return mu, torch.zeros_like(mu)
+            w = torch.triangular_solve(k_star.transpose(-1, -2), self.chol_cache["L"], upper=False)[0]
+            var = self.covar_module.outputscale - torch.sum(w ** 2, dim=0)
+        return mu, var.clamp_min(1e-10)
+
     def forward(self, x):
 
         # Normal mean + covar
@@ -72,7 +196,11 @@ class TanimotoGP(ExactGP, botorch.models.gpytorch.GPyTorchModel):
 
 
 class TanimotoSGP(TanimotoGP):
-    """SGPR with Tanimoto GP"""
+    """
+    SGPR with Tanimoto GP. Inducing points are fixed (not optimized), since fingerprints
+    are discrete; use set_inducing_points to move them. Predictions go through a cached
+    O(n m^2) factorization, so they never form the n x n training kernel matrix.
+    """
 
     def __init__(self, *args, inducing_points=None, **kwargs):
         assert inducing_points is not None
@@ -82,9 +210,67 @@ class TanimotoSGP(TanimotoGP):
         self.base_covar_module = self.covar_module
         self.covar_module = InducingPointKernel(
             self.base_covar_module,
-            inducing_points=inducing_points,
+            inducing_points=torch.zeros(1, 1),
             likelihood=self.likelihood,
         )
+        self.set_inducing_points(inducing_points)
+        self.incremental = True
+
+    def set_inducing_points(self, inducing_points):
+        # Registered without gradient, which also allows bit-packed int64 fingerprints
+        self.covar_module.inducing_points = torch.nn.Parameter(inducing_points, requires_grad=False)
+        self.covar_module._clear_cache()
+        self.chol_cache = None
+
+    def _kernel(self, x1, x2):
+        return self.base_covar_module.outputscale * tanimoto_sim(x1, x2)
+
+    def refactorize(self):
+        """
+        O(n m^2) factorization of the SGPR (Titsias) posterior:
+        L_uu L_uu^T = K_uu, A = L_uu^-1 K_uf / sigma, L_B L_B^T = I + A A^T
+        """
+        x = self.train_inputs[0]
+        y = self.train_targets
+        z = self.covar_module.inducing_points
+        with torch.no_grad():
+            sigma = self.likelihood.noise.sqrt()
+            L_uu = psd_safe_cholesky(self._kernel(z, z))
+            A = torch.triangular_solve(self._kernel(z, x), L_uu, upper=False)[0] / sigma
+            B = A @ A.transpose(-1, -2) + torch.eye(len(z), dtype=A.dtype, device=A.device)
+            L_B = psd_safe_cholesky(B)
+            c = torch.triangular_solve(
+                A @ (y - self.mean_module.constant).unsqueeze(-1), L_B, upper=False
+            )[0] / sigma
+        self.chol_cache = dict(L_uu=L_uu, L_B=L_B, c=c, hparams=self.hparam_dict)
+
+    def append_train_data(self, inputs, targets):
+        """Add a batch of training points; the next prediction refactorizes in O(n m^2)"""
+        self.set_train_data(
+            inputs=torch.cat([self.train_inputs[0], inputs], dim=0),
+            targets=torch.cat([self.train_targets, targets], dim=0),
+            strict=False,
+        )
+
+    def incremental_predict(self, x, include_var=True):
+        """Posterior mean/variance of the latent function from the cached factorization"""
+        if self.chol_cache is None or self.chol_cache["hparams"] != self.hparam_dict:
+            self.refactorize()
+        cache = self.chol_cache
+        with torch.no_grad():
+            tmp1 = torch.triangular_solve(
+                self._kernel(self.covar_module.inducing_points, x), cache["L_uu"], upper=False
+            )[0]
+            tmp2 = torch.triangular_solve(tmp1, cache["L_B"], upper=False)[0]
+            mu = self.mean_module.constant + (tmp2.transpose(-1, -2) @ cache["c"]).squeeze(-1)
+            if not include_var:
+                return mu, torch.zeros_like(mu)
+            var = (
+                self.base_covar_module.outputscale
+                - torch.sum(tmp1 ** 2, dim=0)
+                + torch.sum(tmp2 ** 2, dim=0)
+            )
+        return mu, var.clamp_min(1e-10)
 
     @property
     def hparam_dict(self):
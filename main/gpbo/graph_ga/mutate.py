@@ -2,7 +2,7 @@ import random
 
 import numpy as np
 from rdkit import Chem, rdBase
-from rdkit.Chem import AllChem
+from main.graph_ga.reactions import reaction, pattern
 
 from . import crossover as co
 
@@ -101,7 +101,7 @@ def change_atom(mol):
     p = [0.15, 0.15, 0.14, 0.14, 0.14, 0.14, 0.14]
 
     X = np.random.choice(choices, p=p)
-    while not mol.HasSubstructMatch(Chem.MolFromSmarts("[" + X + "]")):
+    while not mol.HasSubstructMatch(pattern("[" + X + "]")):
         X = np.random.choice(choices, p=p)
     Y = np.random.choice(choices, p=p)
     while Y == X:
@@ -133,7 +133,7 @@ def mutate(mol, mutation_rate):
 
         # print 'mutation',rxn_smarts
 
-        rxn = AllChem.ReactionFromSmarts(rxn_smarts)
+        rxn = reaction(rxn_smarts)
 
         new_mol_trial = rxn.RunReactants((mol,))
 
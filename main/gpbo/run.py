@@ -4,17 +4,19 @@ import functools
 import heapq
 import torch
 import gpytorch
-from rdkit.Chem import rdMolDescriptors
 import sys
 sys.path.append('.')
 from main.optimizer import BaseOptimizer
+from main.utils.chem import canonicalize_list
 
 from gp import (
     TanimotoGP,
+    TanimotoSGP,
     batch_predict_mu_var_numpy,
     fit_gp_hyperparameters,
+    select_inducing_points,
 )
-from fingerprints import smiles_to_fp_array
+from fingerprints import FingerprintCache
 from bo import acquisition_funcs, gp_bo
 from function_utils import CachedBatchFunction
 from graph_ga.graph_ga import run_ga_maximization
@@ -29,22 +31,38 @@ def get_trained_gp(X_train, y_train,):
     fit_gp_hyperparameters(model)
     return model
 
+
+def get_trained_sgp(X_train, y_train, num_inducing_points):
+
+    # Sparse GP on all the data, inducing points spread over the Tanimoto space
+    # starting from the best molecule
+    X_train = torch.as_tensor(X_train)
+    y_train = torch.as_tensor(y_train)
+    idxs = select_inducing_points(X_train, num_inducing_points, start=int(torch.argmax(y_train)))
+    model = TanimotoSGP(
+        train_x=X_train, train_y=y_train, inducing_points=X_train[idxs].clone()
+    )
+    fit_gp_hyperparameters(model)
+    return model
+
 # Optimize acquisition function with genetic algorithm
 def maximize_acquisition_func_ga(
     gp_model: TanimotoGP,
     acq_func_np: callable,
     starting_smiles: list,
-    smiles_to_np_fingerprint: callable,
+    fingerprint_cache: FingerprintCache,
     **ga_kwargs,
 ):
 
     # Construct acquisition function for GA
     def _acq_func_smiles(smiles_list):
-        fp_array = np.stack(list(map(smiles_to_np_fingerprint, smiles_list)))
+        fp_array = fingerprint_cache.stack(smiles_list)
         if gp_model.train_inputs[0].dtype == torch.float32:
             fp_array = fp_array.astype(np.float32)
         elif gp_model.train_inputs[0].dtype == torch.float64:
             fp_array = fp_array.astype(np.float64)
+        elif gp_model.train_inputs[0].dtype == torch.int64:
+            fp_array = fp_array.astype(np.int64)  # bit-packed fingerprints
         else:
             raise ValueError(gp_model.train_inputs[0].dtype)
         mu_pred, var_pred = batch_predict_mu_var_numpy(
@@ -105,6 +123,13 @@ class GPBO_Optimizer(BaseOptimizer):
         def refit_gp_change_subset(bo_iter, gp_model, bo_state_dict):
             gp_model.train()
             x = gp_model.train_inputs[0]
+            if sparse_gp:
+                # Keep all the data, re-spread the inducing points over it
+                y = gp_model.train_targets
+                idxs = select_inducing_points(x, config['n_inducing_points'], start=int(torch.argmax(y)))
+                gp_model.set_inducing_points(x[idxs].clone())
+                gp_model.eval()
+                return
             y = gp_model.train_targets.detach().cpu().numpy()
             idxs = get_inducing_indices(y)
             gp_model.set_train_data(
@@ -117,6 +142,12 @@ class GPBO_Optimizer(BaseOptimizer):
         self.oracle.assign_evaluator(oracle)
         torch.set_default_dtype(torch.float64)
         NP_DTYPE = np.float64
+        # Bit-packed int64 fingerprints use the popcount Tanimoto kernel
+        packed_fp = config.get('packed_fp', False)
+        FP_DTYPE = np.int64 if packed_fp else NP_DTYPE
+        # Sparse GP mode trains on every evaluated molecule at O(n m^2) cost,
+        # instead of an exact GP on a subset
+        sparse_gp = config.get('sparse_gp', False)
 
         # Load start smiles
         if self.smi_file is not None:
@@ -126,28 +157,34 @@ class GPBO_Optimizer(BaseOptimizer):
             # Exploration run
             starting_population = np.random.choice(self.all_smiles, config["initial_population_size"])
 
-        smiles_pool = set(starting_population)
+        # Canonical like the oracle buffer and the GA's output, so the fingerprint cache
+        # holds one entry per molecule
+        smiles_pool = set(canonicalize_list(starting_population))
 
         # Create data; fit exact GP
-        fingerprint_func = functools.partial(
-            rdMolDescriptors.GetMorganFingerprintAsBitVect,
+        # Fingerprints are shared by the GP training set, the acquisition GA and every BO iteration
+        fingerprint_cache = FingerprintCache(
             radius=config['fp_radius'],
-            nBits=config['fp_nbits'],
-        )
-        smiles_to_np_fingerprint = functools.partial(
-            smiles_to_fp_array, fingerprint_func=fingerprint_func
+            n_bits=config['fp_nbits'],
+            packed=packed_fp,
+            maxsize=config.get('fp_cache_size', 200000),
+            n_jobs=self.n_jobs,
         )
         gp_train_smiles = list(smiles_pool)
-        x_train = np.stack([smiles_to_np_fingerprint(s) for s in gp_train_smiles]).astype(NP_DTYPE)
+        x_train = fingerprint_cache.stack(gp_train_smiles, dtype=FP_DTYPE)
         values = self.oracle(gp_train_smiles)
         y_train = np.asarray(values).astype(NP_DTYPE)
 
-        ind_idx_start = get_inducing_indices(y_train)
-        x_train = torch.as_tensor(x_train)
-        y_train = torch.as_tensor(y_train)
-        gp_model = get_trained_gp(
-            x_train[ind_idx_start], y_train[ind_idx_start]
-        )
+        if sparse_gp:
+            gp_model = get_trained_sgp(x_train, y_train, config['n_inducing_points'])
+        else:
+            ind_idx_start = get_inducing_indices(y_train)
+            x_train = torch.as_tensor(x_train)
+            y_train = torch.as_tensor(y_train)
+            gp_model = get_trained_gp(
+                x_train[ind_idx_start], y_train[ind_idx_start]
+            )
+            gp_model.incremental = config.get('incremental_gp', False)
 
         # Run GP-BO           
         with gpytorch.settings.sgpr_diagonal_correction(False):    
@@ -187,9 +224,7 @@ class GPBO_Optimizer(BaseOptimizer):
             gp_train_smiles_scores = self.oracle(list(gp_train_smiles_set))
 
             # Store GP training data
-            x_train_np = np.stack(
-                list(map(smiles_to_np_fingerprint, gp_train_smiles_list))
-            ).astype(NP_DTYPE)
+            x_train_np = fingerprint_cache.stack(gp_train_smiles_list, dtype=FP_DTYPE)
             y_train_np = np.array(gp_train_smiles_scores).astype(NP_DTYPE)
             print("Initial GP model training")
             gp_model.set_train_data(
@@ -210,6 +245,7 @@ class GPBO_Optimizer(BaseOptimizer):
 
             # Initial fitting of GP hyperparameters
             refit_gp_change_subset(bo_iter=0, gp_model=gp_model, bo_state_dict=bo_state_dict)
+            gp_has_all_data = False
 
             # Actual BO loop
             for bo_iter in range(1, config['max_bo_iter'] + 1):
@@ -254,7 +290,7 @@ class GPBO_Optimizer(BaseOptimizer):
                     gp_model=gp_model,
                     acq_func_np=curr_acq_func,
                     starting_smiles=list(ga_start_smiles),
-                    smiles_to_np_fingerprint=smiles_to_np_fingerprint,
+                    fingerprint_cache=fingerprint_cache,
                     max_generations=config['ga_max_generations'],
                     population_size=config['ga_population_size'],
                     offspring_size=config['ga_offspring_size'],
@@ -283,9 +319,7 @@ class GPBO_Optimizer(BaseOptimizer):
                     len(smiles_batch) > 0
                 ), "Empty batch, shouldn't happen. Must be problem with GA."
                 
-                smiles_batch_np = np.stack(
-                    list(map(smiles_to_np_fingerprint, smiles_batch))
-                ).astype(x_train_np.dtype)
+                smiles_batch_np = fingerprint_cache.stack(smiles_batch, dtype=x_train_np.dtype)
 
                 # Get predictions about SMILES batch before training on it
                 smiles_batch_mu_pre, smiles_batch_var_pre = batch_predict_mu_var_numpy(
@@ -303,11 +337,25 @@ class GPBO_Optimizer(BaseOptimizer):
                     [y_train_np, np.asarray(smiles_batch_scores, dtype=y_train_np.dtype)],
                     axis=0,
                 )
-                gp_model.set_train_data(
-                    inputs=torch.as_tensor(x_train_np),
-                    targets=torch.as_tensor(y_train_np),
-                    strict=False,
-                )
+                if gp_model.incremental and gp_has_all_data:
+                    # Extends the cached Cholesky factor by the batch instead of refactorizing
+                    gp_model.append_train_data(
+                        torch.as_tensor(smiles_batch_np),
+                        torch.as_tensor(np.asarray(smiles_batch_scores, dtype=y_train_np.dtype)),
+                    )
+                else:
+                    # The first batch after the refit resets the GP from the refit subset
+                    # to all the data; later batches can then be appended incrementally
+                    gp_model.set_train_data(
+                        inputs=torch.as_tensor(x_train_np),
+                        targets=torch.as_tensor(y_train_np),
+                        strict=False,
+                    )
+                    if gp_model.incremental:
+                        gp_model.refactorize()
+                    gp_has_all_data = True
+                if sparse_gp:
+                    refit_gp_change_subset(bo_iter=bo_iter, gp_model=gp_model, bo_state_dict=bo_state_dict)
 
                 # Add SMILES with high acquisition function values to the priority pool,
                 # Since maybe they will have high acquisition function values next time
@@ -2,15 +2,15 @@ import random
 
 import numpy as np
 from rdkit import Chem, rdBase
-from rdkit.Chem import AllChem
+from main.graph_ga.reactions import reaction, pattern
 rdBase.DisableLog('rdApp.error')
 
 
 def cut(mol):
-    if not mol.HasSubstructMatch(Chem.MolFromSmarts('[*]-;!@[*]')):
+    if not mol.HasSubstructMatch(pattern('[*]-;!@[*]')):
         return None
 
-    bis = random.choice(mol.GetSubstructMatches(Chem.MolFromSmarts('[*]-;!@[*]')))  # single bond not in ring
+    bis = random.choice(mol.GetSubstructMatches(pattern('[*]-;!@[*]')))  # single bond not in ring
 
     bs = [mol.GetBondBetweenAtoms(bis[0], bis[1]).GetIdx()]
 
@@ -28,14 +28,14 @@ def cut_ring(mol):
 
     for i in range(10):
         if random.random() < 0.5:
-            if not mol.HasSubstructMatch(Chem.MolFromSmarts('[R]@[R]@[R]@[R]')):
+            if not mol.HasSubstructMatch(pattern('[R]@[R]@[R]@[R]')):
                 return None
-            bis = random.choice(mol.GetSubstructMatches(Chem.MolFromSmarts('[R]@[R]@[R]@[R]')))
+            bis = random.choice(mol.GetSubstructMatches(pattern('[R]@[R]@[R]@[R]')))
             bis = ((bis[0], bis[1]), (bis[2], bis[3]),)
         else:
-            if not mol.HasSubstructMatch(Chem.MolFromSmarts('[R]@[R;!D2]@[R]')):
+            if not mol.HasSubstructMatch(pattern('[R]@[R;!D2]@[R]')):
                 return None
-            bis = random.choice(mol.GetSubstructMatches(Chem.MolFromSmarts('[R]@[R;!D2]@[R]')))
+            bis = random.choice(mol.GetSubstructMatches(pattern('[R]@[R;!D2]@[R]')))
             bis = ((bis[0], bis[1]), (bis[1], bis[2]),)
 
         bs = [mol.GetBondBetweenAtoms(x, y).GetIdx() for x, y in bis]
@@ -53,16 +53,16 @@ def cut_ring(mol):
 
 
 def ring_OK(mol):
-    if not mol.HasSubstructMatch(Chem.MolFromSmarts('[R]')):
+    if not mol.HasSubstructMatch(pattern('[R]')):
         return True
 
-    ring_allene = mol.HasSubstructMatch(Chem.MolFromSmarts('[R]=[R]=[R]'))
+    ring_allene = mol.HasSubstructMatch(pattern('[R]=[R]=[R]'))
 
     cycle_list = mol.GetRingInfo().AtomRings()
     max_cycle_length = max([len(j) for j in cycle_list])
     macro_cycle = max_cycle_length > 6
 
-    double_bond_in_small_ring = mol.HasSubstructMatch(Chem.MolFromSmarts('[r3,r4]=[r3,r4]'))
+    double_bond_in_small_ring = mol.HasSubstructMatch(pattern('[r3,r4]=[r3,r4]'))
 
     return not ring_allene and not macro_cycle and not double_bond_in_small_ring
 
@@ -85,7 +85,7 @@ def mol_ok(mol):
 
 
 def crossover_ring(parent_A, parent_B):
-    ring_smarts = Chem.MolFromSmarts('[R]')
+    ring_smarts = pattern('[R]')
     if not parent_A.HasSubstructMatch(ring_smarts) and not parent_B.HasSubstructMatch(ring_smarts):
         return None
 
@@ -101,7 +101,7 @@ def crossover_ring(parent_A, parent_B):
 
         new_mol_trial = []
         for rs in rxn_smarts1:
-            rxn1 = AllChem.ReactionFromSmarts(rs)
+            rxn1 = reaction(rs)
             new_mol_trial = []
             for fa in fragments_A:
                 for fb in fragments_B:
@@ -109,7 +109,7 @@ def crossover_ring(parent_A, parent_B):
 
         new_mols = []
         for rs in rxn_smarts2:
-            rxn2 = AllChem.ReactionFromSmarts(rs)
+            rxn2 = reaction(rs)
             for m in new_mol_trial:
                 m = m[0]
                 if mol_ok(m):
@@ -134,7 +134,7 @@ def crossover_non_ring(parent_A, parent_B):
         fragments_B = cut(parent_B)
         if fragments_A is None or fragments_B is None:
             return None
-        rxn = AllChem.ReactionFromSmarts('[*:1]-[1*].[1*]-[*:2]>>[*:1]-[*:2]')
+        rxn = reaction('[*:1]-[1*].[1*]-[*:2]>>[*:1]-[*:2]')
         new_mol_trial = []
         for fa in fragments_A:
             for fb in fragments_B:
@@ -0,0 +1,33 @@
+from rdkit import Chem, rdBase
+from rdkit.Chem import AllChem
+rdBase.DisableLog('rdApp.error')
+
+
+# Per-process registries of compiled objects, keyed by their SMARTS. Each mutation type and
+# atom/bond choice maps to one SMARTS string, so the mutation and crossover code keeps its
+# random draws unchanged and only the compilation is shared.
+_reactions = {}
+_patterns = {}
+
+
+def reaction(rxn_smarts):
+    """
+    Compiled reaction for a reaction SMARTS, built once per process.
+    """
+    rxn = _reactions.get(rxn_smarts)
+    if rxn is None:
+        rxn = AllChem.ReactionFromSmarts(rxn_smarts)
+        rxn.Initialize()
+        _reactions[rxn_smarts] = rxn
+    return rxn
+
+
+def pattern(smarts):
+    """
+    Compiled query molecule for a SMARTS pattern, built once per process.
+    """
+    patt = _patterns.get(smarts)
+    if patt is None:
+        patt = Chem.MolFromSmarts(smarts)
+        _patterns[smarts] = patt
+    return patt
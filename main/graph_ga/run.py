@@ -27,26 +27,54 @@ def make_mating_pool(population_mol: List[Mol], population_scores, offspring_siz
     Returns: a list of RDKit Mol (probably not unique)
     """
     # scores -> probs 
-    population_scores = [s + MINIMUM for s in population_scores]
-    sum_scores = sum(population_scores)
-    population_probs = [p / sum_scores for p in population_scores]
-    mating_pool = np.random.choice(population_mol, p=population_probs, size=offspring_size, replace=True)
-    return mating_pool
+    population_scores = np.asarray(population_scores, dtype=np.float64) + MINIMUM
+    population_probs = population_scores / population_scores.sum()
+    mating_idx = np.random.choice(len(population_mol), p=population_probs, size=offspring_size, replace=True)
+    return [population_mol[i] for i in mating_idx]
 
 
-def reproduce(mating_pool, mutation_rate):
+def reproduce_batch(mating_pool_smiles, mutation_rate, n_children, seed):
     """
+    Generate a chunk of offspring in one worker task, so the mating pool is shipped 
+    once per chunk instead of once per child
     Args:
+        mating_pool_smiles: list of SMILES, parsed once per chunk
+        mutation_rate: rate of mutation
+        n_children: number of offspring to generate
+        seed: seed of random and np.random for this chunk
+    Returns: a list of SMILES, None where reproduction failed
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    mating_pool = [Chem.MolFromSmiles(s) for s in mating_pool_smiles]
+    offspring_smiles = []
+    for _ in range(n_children):
+        # crossover kekulizes its parents in place, so work on copies
+        parent_a = Chem.Mol(random.choice(mating_pool))
+        parent_b = Chem.Mol(random.choice(mating_pool))
+        new_child = co.crossover(parent_a, parent_b)
+        if new_child is not None:
+            new_child = mu.mutate(new_child, mutation_rate)
+        offspring_smiles.append(None if new_child is None else Chem.MolToSmiles(new_child))
+    return offspring_smiles
+
+
+def reproduce_parallel(pool, mating_pool, mutation_rate, offspring_size, n_chunks):
+    """
+    Args:
+        pool: joblib.Parallel instance
         mating_pool: list of RDKit Mol
         mutation_rate: rate of mutation
-    Returns:
+        offspring_size: number of offspring to generate
+        n_chunks: number of worker tasks to split the offspring into
+    Returns: a list of RDKit Mol, None where reproduction failed
     """
-    parent_a = random.choice(mating_pool)
-    parent_b = random.choice(mating_pool)
-    new_child = co.crossover(parent_a, parent_b)
-    if new_child is not None:
-        new_child = mu.mutate(new_child, mutation_rate)
-    return new_child
+    mating_pool_smiles = [Chem.MolToSmiles(mol) for mol in mating_pool]
+    chunk_sizes = [len(c) for c in np.array_split(np.arange(offspring_size), n_chunks) if len(c) > 0]
+    seeds = np.random.randint(0, 2**31 - 1, size=len(chunk_sizes))
+    chunks = pool(delayed(reproduce_batch)(mating_pool_smiles, mutation_rate, n, seed) 
+                  for n, seed in zip(chunk_sizes, seeds.tolist()))
+    return [None if s is None else Chem.MolFromSmiles(s) for chunk in chunks for s in chunk]
 
 
 class GB_GA_Optimizer(BaseOptimizer):
@@ -60,6 +88,7 @@ class GB_GA_Optimizer(BaseOptimizer):
         self.oracle.assign_evaluator(oracle)
 
         pool = joblib.Parallel(n_jobs=self.n_jobs)
+        n_chunks = joblib.effective_n_jobs(self.n_jobs)
         
         if self.smi_file is not None:
             # Exploitation run
@@ -79,14 +108,13 @@ class GB_GA_Optimizer(BaseOptimizer):
         while True:
 
             if len(self.oracle) > 100:
-                self.sort_buffer()
-                old_score = np.mean([item[1][0] for item in list(self.mol_buffer.items())[:100]])
+                old_score = self.topk_mean(100)
             else:
                 old_score = 0
 
             # new_population
             mating_pool = make_mating_pool(population_mol, population_scores, config["population_size"])
-            offspring_mol = pool(delayed(reproduce)(mating_pool, config["mutation_rate"]) for _ in range(config["offspring_size"]))
+            offspring_mol = reproduce_parallel(pool, mating_pool, config["mutation_rate"], config["offspring_size"], n_chunks)
 
             # add new_population
             population_mol += offspring_mol
@@ -111,8 +139,7 @@ class GB_GA_Optimizer(BaseOptimizer):
 
             ### early stopping
             if len(self.oracle) > 100:
-                self.sort_buffer()
-                new_score = np.mean([item[1][0] for item in list(self.mol_buffer.items())[:100]])
+                new_score = self.topk_mean(100)
                 # import ipdb; ipdb.set_trace()
                 if (new_score - old_score) < 1e-3:
                     patience += 1
@@ -7,13 +7,16 @@ import random
 import yaml
 from time import time
 
+import joblib
 import numpy as np
+from joblib import delayed
 from rdkit import Chem, rdBase
 from rdkit.Chem import AllChem
 rdBase.DisableLog('rdApp.error')
 from tdc import Oracle
 
 from stats import Stats, get_stats_from_pickle
+from main.graph_ga.reactions import reaction, pattern
 from main.optimizer import BaseOptimizer
 
 
@@ -27,8 +30,8 @@ def run_rxn(rxn_smarts, mol):
         Chem.Kekulize(mol_copy)
     except ValueError:
         pass
-    if mol_copy.HasSubstructMatch(Chem.MolFromSmarts(patt)):
-        rxn = AllChem.ReactionFromSmarts(rxn_smarts)
+    if mol_copy.HasSubstructMatch(pattern(patt)):
+        rxn = reaction(rxn_smarts)
         new_mols = rxn.RunReactants((mol_copy,))
         for new_mol in new_mols:
             try:
@@ -49,13 +52,13 @@ def add_atom(rdkit_mol, stats: Stats):
     old_mol = Chem.Mol(rdkit_mol)
     if np.random.random() < 0.63:  # probability of adding ring atom
         rxn_smarts = np.random.choice(stats.rxn_smarts_ring_list, p=stats.p_ring)
-        if not rdkit_mol.HasSubstructMatch(Chem.MolFromSmarts('[r3,r4,r5]')) \
+        if not rdkit_mol.HasSubstructMatch(pattern('[r3,r4,r5]')) \
                 or AllChem.CalcNumAliphaticRings(rdkit_mol) == 0:
             rxn_smarts = np.random.choice(stats.rxn_smarts_make_ring, p=stats.p_ring)
             if np.random.random() < 0.036:  # probability of starting a fused ring
                 rxn_smarts = rxn_smarts.replace("!", "")
     else:
-        if rdkit_mol.HasSubstructMatch(Chem.MolFromSmarts('[*]1=[*]-[*]=[*]-1')):
+        if rdkit_mol.HasSubstructMatch(pattern('[*]1=[*]-[*]=[*]-1')):
             rxn_smarts = '[r4:1][r4:2]>>[*:1]C[*:2]'
         else:
             rxn_smarts = np.random.choice(stats.rxn_smarts_list, p=stats.p)
@@ -70,7 +73,7 @@ def add_atom(rdkit_mol, stats: Stats):
 def expand_small_rings(rdkit_mol):
     Chem.Kekulize(rdkit_mol, clearAromaticFlags=True)
     rxn_smarts = '[*;r3,r4;!R2:1][*;r3,r4:2]>>[*:1]C[*:2]'
-    while rdkit_mol.HasSubstructMatch(Chem.MolFromSmarts('[r3,r4]=[r3,r4]')):
+    while rdkit_mol.HasSubstructMatch(pattern('[r3,r4]=[r3,r4]')):
         rdkit_mol = run_rxn(rxn_smarts, rdkit_mol)
     return rdkit_mol
 
@@ -89,17 +92,24 @@ def valences_not_too_large(rdkit_mol):
 
 class State:
 
-    def __init__(self, oracle, mol, smiles, max_atoms, max_children, stats: Stats, seed):
+    def __init__(self, oracle, mol, smiles, max_atoms, max_children, stats: Stats, seed, score=None, evaluate=True):
+        """
+        The state is scored by the oracle on creation, unless a score is given, there is
+        no oracle (in rollout workers, which leave scoring to the main process) or evaluate
+        is False (the caller scores a batch of states at once and sets their score).
+        """
         self.mol = mol
         self.turn = max_atoms
         self.smiles = smiles
         self.oracle = oracle
-        self.score = self.oracle(self.smiles)
+        if score is None and oracle is not None and evaluate:
+            score = self.oracle(self.smiles)
+        self.score = score
         self.max_children = max_children
         self.stats = stats
         self.seed = seed
 
-    def next_state(self):
+    def next_state(self, evaluate=True):
         smiles = self.smiles
         # TODO: this seems dodgy...
         for i in range(100):
@@ -113,7 +123,8 @@ class State:
                            max_atoms=self.turn - 1,
                            max_children=self.max_children,
                            stats=self.stats,
-                           seed=self.seed)
+                           seed=self.seed,
+                           evaluate=evaluate)
         return next_state
 
     def terminal(self):
@@ -138,8 +149,20 @@ class State:
         else:
             return 0.0
 
+    @property
+    def smiles(self):
+        return self._smiles
+
+    @smiles.setter
+    def smiles(self, smiles):
+        self._smiles = smiles
+        self._hash = None
+
     def __hash__(self):
-        return int(hashlib.md5(str(self.smiles).encode('utf-8')).hexdigest(), 16)
+        # cached, as states are compared against all their siblings on every expansion
+        if self._hash is None:
+            self._hash = int(hashlib.md5(str(self.smiles).encode('utf-8')).hexdigest(), 16)
+        return self._hash
 
     def __eq__(self, other):
         if hash(self) == hash(other):
@@ -176,7 +199,7 @@ class Node:
         return s
 
 
-def tree_policy(node, exploration_coefficient=(1/math.sqrt(2.0))):
+def tree_policy(node, exploration_coefficient=(1/math.sqrt(2.0)), evaluate=True):
     # a hack to force 'exploitation' in a game where there are many options, and you may never/not want to fully expand first
     while node.fully_expanded() and not node.state.oracle.finish:
         node = best_child(node, exploration_coefficient)
@@ -184,25 +207,25 @@ def tree_policy(node, exploration_coefficient=(1/math.sqrt(2.0))):
     if node.state.terminal():
         return node
     else:
-        node = expand_all(node)
+        node = expand_all(node, evaluate)
         return node
 
 
-def expand_all(node):
+def expand_all(node, evaluate=True):
     lcount = 0
     while not node.fully_expanded() and lcount < node.state.max_children and not node.state.oracle.finish:
         lcount += 1
-        node = expand(node)
+        node = expand(node, evaluate)
     return node
 
 
-def expand(node):
+def expand(node, evaluate=True):
     tried_children = [c.state for c in node.children]
-    new_state = node.state.next_state()
+    new_state = node.state.next_state(evaluate)
     lcount = 0
     while new_state in tried_children and lcount < new_state.max_children:
         lcount += 1
-        new_state = node.state.next_state()
+        new_state = node.state.next_state(evaluate)
     node.add_child(new_state)
     return node
 
@@ -244,6 +267,61 @@ def backup(node, reward):
     return
 
 
+def rollout(mol, smiles, max_atoms, max_children, stats: Stats, seed):
+    """
+    Default policy from a state in a worker process, without scoring.
+
+    Returns the SMILES of the states created on the way, as they were when they were
+    created (which is what the serial policy scores), the last one terminal.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    state = State(oracle=None, mol=mol, smiles=smiles, max_atoms=max_atoms,
+                  max_children=max_children, stats=stats, seed=seed)
+    path = []
+    while not state.terminal():
+        state = state.next_state()
+        path.append(state.smiles)
+    return path
+
+
+def default_policy_parallel(pool, states, best_state, oracle):
+    """
+    default_policy for a batch of states: the rollouts run in parallel on the pool and
+    all the states they visit are scored by the oracle in a single batch.
+
+    Returns the rewards, in the order of states, and the new best state.
+    """
+    seeds = np.random.randint(0, 2**31 - 1, size=len(states))
+    paths = pool(delayed(rollout)(s.mol, s.smiles, s.turn, s.max_children, s.stats, seed)
+                 for s, seed in zip(states, seeds.tolist()))
+    scores = oracle([smi for path in paths for smi in path])
+
+    rewards = []
+    i = 0
+    for state, path in zip(states, paths):
+        i += len(path)
+        if len(path) > 0:
+            state = State(oracle=None, mol=None, smiles=path[-1], max_atoms=0,
+                          max_children=state.max_children, stats=state.stats,
+                          seed=state.seed, score=scores[i - 1])
+        reward = state.reward(best_state)
+        if reward == 1:
+            best_state = state
+        rewards.append(reward)
+    return rewards, best_state
+
+
+def add_virtual_loss(node, n=1):
+    """
+    Count n pending visits without reward on node and its ancestors, so that the next
+    selections avoid the paths whose rollouts are still running. Undone with n=-n.
+    """
+    while node is not None:
+        node.visits += n
+        node = node.parent
+
+
 class Graph_MCTS_Optimizer(BaseOptimizer):
 
     def __init__(self, args=None):
@@ -256,6 +334,7 @@ class Graph_MCTS_Optimizer(BaseOptimizer):
 
         init_mol = Chem.MolFromSmiles(config["init_smiles"])
         stats = get_stats_from_pickle(self.args.pickle_directory)
+        pool = joblib.Parallel(n_jobs=self.n_jobs)
 
         # evolution: go go go!!
         while True:
@@ -274,6 +353,10 @@ class Graph_MCTS_Optimizer(BaseOptimizer):
                                 stats=stats, 
                                 seed=tmp_seed))
 
+            if config.get("parallel_rollouts", False):
+                self.search_parallel(pool, root_node, best_state, config)
+                continue
+
             for _ in range(int(config["num_sims"])):
                 front = tree_policy(root_node, exploration_coefficient=config["exploration_coefficient"])
                 if self.finish:
@@ -284,3 +367,38 @@ class Graph_MCTS_Optimizer(BaseOptimizer):
                     if self.finish:
                         break
 
+    def search_parallel(self, pool, root_node, best_state, config):
+        """
+        The simulations of one tree search, with the rollouts from several fronts run
+        in parallel on the pool. Fronts are selected one after another, with a virtual
+        loss on the paths to those already selected, until there is about one rollout
+        per worker. The children expanded for a front are scored in one oracle call.
+        The rollouts of the fronts then run together and are backed up.
+        """
+        n_fronts = max(1, joblib.effective_n_jobs(self.n_jobs) // config["max_children"])
+        n_sims = int(config["num_sims"])
+        while n_sims > 0 and not self.finish:
+            children = []
+            for _ in range(min(n_fronts, n_sims)):
+                front = tree_policy(root_node, exploration_coefficient=config["exploration_coefficient"],
+                                    evaluate=False)
+                # the front's new children are scored in one oracle call, before any other
+                # selection can see them (and terminal() can change their SMILES)
+                unscored = [child.state for child in front.children if child.state.score is None]
+                if unscored:
+                    for state, score in zip(unscored, self.oracle([state.smiles for state in unscored])):
+                        state.score = score
+                if self.finish:
+                    break
+                for child in front.children:
+                    add_virtual_loss(child)
+                children.extend(front.children)
+                n_sims -= 1
+            if not children:
+                break
+
+            rewards, best_state = default_policy_parallel(
+                pool, [child.state for child in children], best_state, self.oracle)
+            for child, reward in zip(children, rewards):
+                add_virtual_loss(child, -1)
+                backup(child, reward)
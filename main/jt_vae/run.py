@@ -72,8 +72,7 @@ class JTVAE_BO_Optimizer(BaseOptimizer):
         while True:
 
             if len(self.oracle) > 100:
-                self.sort_buffer()
-                old_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+                old_scores = [item[1][0] for item in self.topk(100)]
             else:
                 old_scores = 0
             
@@ -118,8 +117,7 @@ class JTVAE_BO_Optimizer(BaseOptimizer):
 
             # early stopping
             if len(self.oracle) > 800:
-                self.sort_buffer()
-                new_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+                new_scores = [item[1][0] for item in self.topk(100)]
                 if new_scores == old_scores:
                     patience += 1
                     if patience >= self.args.patience * 5:
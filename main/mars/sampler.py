@@ -176,8 +176,7 @@ class Sampler():
         while True:
 
             if len(self.oracle) > 100:
-                self.oracle.sort_buffer()
-                old_scores_forst = [item[1][0] for item in list(self.oracle.mol_buffer.items())[:50]]
+                old_scores_forst = [item[1][0] for item in self.oracle.topk(50)]
             else:
                 old_scores_forst = 0
 
@@ -256,8 +255,7 @@ class Sampler():
                 step += 1
 
             if len(self.oracle) > 100:
-                self.oracle.sort_buffer()
-                new_scores_forst = [item[1][0] for item in list(self.oracle.mol_buffer.items())[:50]]
+                new_scores_forst = [item[1][0] for item in self.oracle.topk(50)]
                 if new_scores_forst == old_scores_forst:
                     patience += 1
                     if patience >= 5:
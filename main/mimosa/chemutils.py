@@ -92,6 +92,7 @@ def load_vocabulary():
 	return vocabulary 
 
 vocabulary = load_vocabulary()
+vocabulary_idx = {word:idx for idx,word in enumerate(vocabulary)}  ### word -> index, instead of scanning the list 
 bondtype_list = [rdkit.Chem.rdchem.BondType.SINGLE, rdkit.Chem.rdchem.BondType.DOUBLE]
 
 
@@ -100,7 +101,7 @@ def ith_substructure_is_atom(i):
     return True if len(substructure)==1 else False
 
 def word2idx(word):
-    return vocabulary.index(word)
+    return vocabulary_idx[word]
 
 
 # def smiles2fingerprint(smiles):
@@ -134,12 +135,9 @@ def similarity_matrix(smiles_lst):
     sim_matrix = np.eye(n)
     mol_lst = [Chem.MolFromSmiles(smiles) for smiles in smiles_lst]
     fingerprint_lst = [AllChem.GetMorganFingerprintAsBitVect(mol, 2, nBits=2048, useChirality=False) for mol in mol_lst]
-    for i in range(n):
-        fp1 = fingerprint_lst[i]
-        for j in range(i+1,n):
-            fp2 = fingerprint_lst[j]
-            sim = DataStructs.TanimotoSimilarity(fp1, fp2)
-            sim_matrix[i,j] = sim_matrix[j,i] = sim
+    for i in range(n - 1):
+        sims = DataStructs.BulkTanimotoSimilarity(fingerprint_lst[i], fingerprint_lst[i+1:])
+        sim_matrix[i,i+1:] = sim_matrix[i+1:,i] = sims
     return sim_matrix 
 
 
@@ -326,6 +324,21 @@ def smiles2feature(smiles):
         (1) molecule2tree
         (2) mask leaf node 
     """
+    tree = smiles2tree(smiles)
+    if tree is None:
+        return None 
+    return mask_leaf(*tree)
+
+
+def smiles2tree(smiles):
+    """
+        molecule2tree, without masking, so it can be cached across epochs 
+
+    Output:
+        idx_lst                 [N]      list of substructure's index
+        adjacency_matrix        [N,N]    0/1 
+        leaf_idx_lst            list of leaf substructures' index 
+    """
     ### 0. smiles -> mol 
     if not is_valid(smiles):
         return None 
@@ -385,6 +398,15 @@ def smiles2feature(smiles):
 
     # print(adjacency_matrix, smiles)
     leaf_idx_lst = list(np.where(np.sum(adjacency_matrix,1)==1)[0])
+    return idx_lst, adjacency_matrix, leaf_idx_lst 
+
+
+def mask_leaf(idx_lst, adjacency_matrix, leaf_idx_lst):
+    """
+        **randomly** mask one leaf node of a tree from smiles2tree 
+    """
+    d = len(vocabulary)
+    N = len(idx_lst)
     mask_idx = random.choice(leaf_idx_lst)
     label = idx_lst[mask_idx]
 
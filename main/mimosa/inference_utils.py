@@ -10,9 +10,12 @@ import torch.nn as nn
 import torch.nn.functional as F
 from tdc import Oracle
 import random 
+import math 
+from joblib import delayed 
 from chemutils import * 
 '''
 optimize_single_molecule_one_iterate
+optimize_molecules_one_iterate
 gnn_prediction_of_single_smiles
 oracle_screening
 gnn_screening
@@ -20,6 +23,7 @@ optimize_single_molecule_all_generations
 similarity_matrix(smiles_lst)
 '''
 from dpp import DPPModel
+from module import batch_graphs
 
 
 
@@ -46,13 +50,13 @@ def oracle_screening(smiles_set, oracle):
 	smiles_score_lst.sort(key=lambda x:x[1], reverse=True)
 	return smiles_score_lst 
 
-def dpp(smiles_score_lst, num_return, lamb):
+def dpp(smiles_score_lst, num_return, lamb, log_det=False):
 	smiles_lst = [i[0] for i in smiles_score_lst]
 	if len(smiles_lst) <= num_return:
 		return smiles_lst, None, None 
 	score_arr = np.array([i[1] for i in smiles_score_lst])
 	sim_mat = similarity_matrix(smiles_lst)
-	dpp_model = DPPModel(smiles_lst = smiles_lst, sim_matrix = sim_mat, f_scores = score_arr, top_k = num_return, lamb = lamb)
+	dpp_model = DPPModel(smiles_lst = smiles_lst, sim_matrix = sim_mat, f_scores = score_arr, top_k = num_return, lamb = lamb, log_det = log_det)
 	smiles_lst, log_det_V, log_det_S = dpp_model.dpp()
 	return smiles_lst, log_det_V, log_det_S 
 
@@ -75,35 +79,90 @@ def optimize_single_node(smiles):
 # bondtype_list = [rdkit.Chem.rdchem.BondType.SINGLE, rdkit.Chem.rdchem.BondType.DOUBLE] ### chemutils 
 
 def optimize_single_molecule_one_iterate(smiles, gnn):
-	target_ = torch.LongTensor([0]).view(-1)
-	if smiles == None:
+	return optimize_molecules_one_iterate([smiles], gnn)
+
+
+def optimize_molecules_one_iterate(smiles_lst, gnn, pool=None, n_chunks=1):
+	'''
+		one iterate of optimize_single_molecule_one_iterate for all the molecules: 
+		the new substructures of every leaf extension of every molecule are predicted in a single batched gnn call 
+
+		pool: joblib.Parallel instance, optional. The RDKit work before and after the gnn call 
+		      (graph decomposition and graph edits) is then split into n_chunks worker tasks; 
+		      the gnn stays in this process. 
+	'''
+	### 1. leaf extensions of all molecules 
+	if pool is None:
+		molecule_lst = expansion_features(smiles_lst)
+	else:
+		chunks = pool(delayed(expansion_features)(chunk) for chunk in split_chunks(smiles_lst, n_chunks))
+		molecule_lst = [molecule for chunk in chunks for molecule in chunk]
+
+	extension_lst = []  ### (smiles, atom indexes of the extended substructure)
+	node_mat_lst, adj_lst, mask_idx_lst = [], [], []
+	for smiles, substructure_lst, feature_lst in molecule_lst:
+		### the jj-th feature extends the jj-th substructure with the masked node 
+		for jj, (node_mat, adj_mat, mask_idx) in enumerate(feature_lst):
+			extension_lst.append((smiles, substructure_lst[jj]))
+			node_mat_lst.append(node_mat)
+			adj_lst.append(adj_mat)
+			mask_idx_lst.append(mask_idx)
+
+	if len(extension_lst) == 0:
 		return set() 
-	if not is_valid(smiles):
-		return set()
-	origin_mol = Chem.rdchem.RWMol(Chem.MolFromSmiles(smiles))
+
+	### 2. batched prediction 
+	predictions = gnn.infer_batch(*batch_graphs(node_mat_lst, adj_lst, mask_idx_lst))
+	extension_lst = [(smiles, leaf_atom_idx_lst, prediction.reshape(-1).argsort().tolist()[::-1][:3]) 
+					 for (smiles, leaf_atom_idx_lst), prediction in zip(extension_lst, predictions)]
+
+	### 3. add the top predicted substructures, each chunk comes back de-duplicated 
+	if pool is None:
+		return extend_molecules(extension_lst)
 	new_smiles_set = set() 
-	jj=-100
-
-	origin_idx_lst, origin_node_mat, origin_substructure_lst, \
-	origin_atomidx_2substridx, origin_adjacency_matrix, leaf_extend_idx_pair = smiles2graph(smiles)
-	try:
-		feature_lst = smiles2expandfeature(smiles)
-	except:
-		return new_smiles_set 
-	for node_mat, adj_mat, mask_idx in feature_lst:
-		node_mat = torch.FloatTensor(node_mat) 
-		adj_mat = torch.FloatTensor(adj_mat)
-		N = adj_mat.shape[0]
-		for jj in range(N):
-			if adj_mat[jj,N-1]==1:
-				break 
-
-		_, prediction = gnn.infer(node_mat, adj_mat, mask_idx, target_)
-		top_idxs = prediction.reshape(-1).argsort().tolist()[::-1][:3]
+	for smiles_set in pool(delayed(extend_molecules)(chunk) for chunk in split_chunks(extension_lst, n_chunks)):
+		new_smiles_set = new_smiles_set.union(smiles_set)
+	return new_smiles_set
+
+
+def split_chunks(lst, n_chunks):
+	chunk_size = max(1, math.ceil(len(lst) / n_chunks))
+	return [lst[i:i+chunk_size] for i in range(0, len(lst), chunk_size)]
+
+
+def expansion_features(smiles_lst):
+	'''
+		output: [(smiles, substructure_lst, feature_lst), ...] for the molecules that can be extended 
+	'''
+	molecule_lst = []
+	for smiles in smiles_lst:
+		if smiles == None:
+			continue 
+		if not is_valid(smiles):
+			continue 
+		origin_idx_lst, origin_node_mat, origin_substructure_lst, \
+		origin_atomidx_2substridx, origin_adjacency_matrix, leaf_extend_idx_pair = smiles2graph(smiles)
+		try:
+			feature_lst = smiles2expandfeature(smiles)
+		except:
+			continue 
+		molecule_lst.append((smiles, origin_substructure_lst, feature_lst))
+	return molecule_lst 
+
+
+def extend_molecules(extension_lst):
+	'''
+		input: [(smiles, atom indexes of the extended substructure, top predicted substructure indexes), ...] 
+		output: set of new smiles 
+	'''
+	new_smiles_set = set() 
+	smiles2mol = dict() 
+	for smiles, leaf_atom_idx_lst, top_idxs in extension_lst:
+		if smiles not in smiles2mol:
+			smiles2mol[smiles] = Chem.rdchem.RWMol(Chem.MolFromSmiles(smiles))
+		origin_mol = smiles2mol[smiles]
 		top_words = [vocabulary[ii] for ii in top_idxs]
 		for substru_idx, word in zip(top_idxs, top_words):
-			leaf_atom_idx_lst = origin_substructure_lst[jj]
-
 			if type(leaf_atom_idx_lst)==int:  ### int: single atom;   else: list of integer
 				leaf_atom_idx_lst = [leaf_atom_idx_lst]
 			for leaf_atom_idx in leaf_atom_idx_lst:
@@ -1,3 +1,4 @@
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -10,6 +11,36 @@ from chemutils import smiles2graph
 device = 'cpu'
 sigmoid = torch.nn.Sigmoid() 
 
+
+def batch_graphs(node_mat_lst, adj_lst, idx_lst):
+    ''' B: # graphs  &  M: total # substructures
+    Input: 
+        node_mat_lst:  B x [N_i,d]
+        adj_lst:       B x [N_i,N_i]
+        idx_lst:       B x integer 
+
+    Output:
+        node_mat       [M,d]
+        adj            [M,M]    sparse block-diagonal, so the graphs stay disconnected 
+        idx            [B]      index of each graph's node in node_mat 
+    '''
+    sizes = [len(adj) for adj in adj_lst]
+    offsets = np.cumsum([0] + sizes[:-1])
+    rows, cols, values = [], [], []
+    for offset, adj in zip(offsets, adj_lst):
+        adj = np.asarray(adj)
+        row, col = np.nonzero(adj)
+        rows.append(row + offset)
+        cols.append(col + offset)
+        values.append(adj[row, col])
+    M = sum(sizes)
+    indices = torch.LongTensor(np.stack([np.concatenate(rows), np.concatenate(cols)]))
+    adj = torch.sparse_coo_tensor(indices, torch.FloatTensor(np.concatenate(values)), (M, M))
+    node_mat = torch.FloatTensor(np.concatenate(node_mat_lst))
+    idx = torch.LongTensor(offsets + np.array(idx_lst))
+    return node_mat, adj, idx 
+
+
 class GCN(nn.Module):
     def __init__(self, nfeat, nhid, num_layer):
         super(GCN, self).__init__()
@@ -43,15 +74,32 @@ class GCN(nn.Module):
         Output:
             scalar   prediction before sigmoid           [-inf, inf]
         '''
+        x = self.node_embed(node_mat, adj)
+        x = x[idx].view(1,-1)
+        logits = self.out_fc(x)
+        return logits 
+        ## without sigmoid 
+
+    def forward_batch(self, node_mat, adj, idx):
+        ''' B: # graphs  &  M: total # substructures, see batch_graphs 
+        Input: 
+            node_mat:  [M,d]  
+            adj:       [M,M]   block-diagonal 
+            idx:       [B] 
+
+        Output:
+            [B,vocabulary size]  predictions before softmax 
+        '''
+        x = self.node_embed(node_mat, adj)
+        return self.out_fc(x[idx.to(self.device)])
+
+    def node_embed(self, node_mat, adj):
         node_mat, adj = node_mat.to(self.device), adj.to(self.device)
         x = self.embedding(node_mat)
         x = F.relu(self.gc1(x,adj))
         for gc in self.gcs:
             x = F.relu(gc(x,adj))
-        x = x[idx].view(1,-1)
-        logits = self.out_fc(x)
-        return logits 
-        ## without sigmoid 
+        return x 
 
     def smiles2embed(self, smiles):
         idx_lst, node_mat, substructure_lst, atomidx_2substridx, adj, leaf_extend_idx_pair = smiles2graph(smiles)
@@ -89,6 +137,19 @@ class GCN(nn.Module):
         self.opt.step() 
         return cost.data.numpy(), pred_y.data.numpy() 
 
+    def learn_batch(self, node_mat, adj, idx, label):
+        pred_y = self.forward_batch(node_mat, adj, idx)
+        cost = self.criteria(pred_y, label.to(self.device)) 
+        self.opt.zero_grad() 
+        cost.backward() 
+        self.opt.step() 
+        return cost.data.numpy(), pred_y.data.numpy() 
+
+    def infer_batch(self, node_mat, adj, idx):
+        with torch.no_grad():
+            pred_y = self.forward_batch(node_mat, adj, idx)
+        return pred_y.data.numpy() 
+
     def infer(self, node_mat, adj, idx, target):
         pred_y = self.forward(node_mat, adj, idx)
         pred_y = pred_y.view(1,-1)
@@ -5,19 +5,27 @@ sys.path.append(path_here)
 sys.path.append('.')
 from tqdm import tqdm 
 from random import shuffle 
-from module import GCN 
-from chemutils import smiles2feature  
+from module import GCN, batch_graphs 
+from chemutils import smiles2tree, mask_leaf  
 from utils import Molecule_Dataset 
 device = 'cpu'
 
-def train_gnn(data, gnn, epoch=5): 
+def smiles2tree_or_none(smiles):
+	try:
+		return smiles2tree(smiles)
+	except:
+		return None 
+
+
+def train_gnn(data, gnn, epoch=5, batch_size=1): 
 	"""
-		data is smiles list 
+		data is a list of (smiles, score) 
+		each step learns from a batch of molecules at once, as one block-diagonal graph 
 	"""
 	shuffle(data)
 	training_set = Molecule_Dataset(data)
 
-	params = {'batch_size': 1,
+	params = {'batch_size': batch_size,
 	          'shuffle': True,
 	          'num_workers': 1}
 	def collate_fn(batch_lst):
@@ -25,27 +33,33 @@ def train_gnn(data, gnn, epoch=5):
 	train_generator = torch.utils.data.DataLoader(training_set, collate_fn = collate_fn, **params)
 
 	cost_lst = []
+	### smiles -> tree (or None), reused across the epochs of this call, only the masked leaf is resampled 
+	tree_cache = dict() 
 
 	for ep in tqdm(range(epoch)):
-		for i, smiles in tqdm(enumerate(train_generator)):
+		for i, batch in tqdm(enumerate(train_generator)):
 			### 1. training
-			smiles = smiles[0][0]
-			try:
-				graph_feature = smiles2feature(smiles)  ### smiles2feature: **randomly** mask one leaf node  
-				if graph_feature is None:
-					# print('graph feature is none')
+			node_mat_lst, adj_lst, idx_lst, label_lst = [], [], [], []
+			for smiles, _ in batch:
+				if smiles not in tree_cache:
+					tree_cache[smiles] = smiles2tree_or_none(smiles)
+				tree = tree_cache[smiles]
+				if tree is None:
+					continue 
+				try:
+					node_mat, adjacency_matrix, idx, label = mask_leaf(*tree)  ### **randomly** mask one leaf node  
+				except:
+					# print('some problems happening')
 					continue 
-				node_mat, adjacency_matrix, idx, label = graph_feature 
-			except:
-				# print('some problems happening')
+				node_mat_lst.append(node_mat)
+				adj_lst.append(adjacency_matrix)
+				idx_lst.append(idx)
+				label_lst.append(label)
+			if len(idx_lst) == 0:
 				continue 
-			# idx_lst, node_mat, substructure_lst, atomidx_2substridx, adjacency_matrix, leaf_extend_idx_pair = smiles2graph(smiles)
-			node_mat = torch.FloatTensor(node_mat).to(device)
-			adjacency_matrix = torch.FloatTensor(adjacency_matrix).to(device)
-			label = torch.LongTensor([label]).view(-1).to(device)
-			cost = gnn.learn(node_mat, adjacency_matrix, idx, label)
+			node_mat, adjacency_matrix, idx = batch_graphs(node_mat_lst, adj_lst, idx_lst)
+			label = torch.LongTensor(label_lst).to(device)
+			cost, _ = gnn.learn_batch(node_mat, adjacency_matrix, idx, label)
 			cost_lst.append(cost)
 
 	return gnn 
-
-
@@ -8,6 +8,7 @@ from chemutils import *
 from inference_utils import * 
 from online_train import * 
 from random import shuffle 
+import joblib 
 class MIMOSA_Optimizer(BaseOptimizer):
 
 	def __init__(self, args=None):
@@ -18,6 +19,8 @@ class MIMOSA_Optimizer(BaseOptimizer):
 
 		self.oracle.assign_evaluator(oracle)
 		all_smiles_score_list = []  
+		pool = joblib.Parallel(n_jobs=self.n_jobs)
+		n_chunks = joblib.effective_n_jobs(self.n_jobs)
 
 		model_ckpt = os.path.join(path_here, "pretrained_model/GNN.ckpt") # mGNN only
 		gnn = torch.load(model_ckpt)
@@ -34,7 +37,7 @@ class MIMOSA_Optimizer(BaseOptimizer):
 
 		all_smiles_score_list.sort(key=lambda x:x[1], reverse=True)
 		good_smiles_list = all_smiles_score_list[:500]
-		train_gnn(good_smiles_list, gnn, epoch=config['train_epoch'])
+		train_gnn(good_smiles_list, gnn, epoch=config['train_epoch'], batch_size=config.get('train_batch_size', 1))
 
 		warmstart_smiles_lst = [i[0] for i in warmstart_smiles_score_lst[:50]] #### only smiles 
 		print("warm start smiles list", warmstart_smiles_lst)
@@ -45,15 +48,11 @@ class MIMOSA_Optimizer(BaseOptimizer):
 		while True:
 
 			if len(self.oracle) > 100:
-				self.sort_buffer()
-				old_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+				old_scores = [item[1][0] for item in self.topk(100)]
 			else:
 				old_scores = 0
 
-			next_set = set()
-			for smiles in current_set:
-				smiles_set = optimize_single_molecule_one_iterate(smiles, gnn)
-				next_set = next_set.union(smiles_set)
+			next_set = optimize_molecules_one_iterate(list(current_set), gnn, pool, n_chunks)
 
 			smiles_lst = list(next_set)
 			shuffle(smiles_lst)
@@ -80,12 +79,11 @@ class MIMOSA_Optimizer(BaseOptimizer):
 			# import ipdb; ipdb.set_trace()
 			# print(f"Training mol length: {len(good_smiles_list)}")
 			good_smiles_list = all_smiles_score_list[:config['train_data_size']]
-			train_gnn(good_smiles_list, gnn, epoch=config['train_epoch'])
+			train_gnn(good_smiles_list, gnn, epoch=config['train_epoch'], batch_size=config.get('train_batch_size', 1))
 
 			# early stopping
 			if len(self.oracle) > 5000:
-				self.sort_buffer()
-				new_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+				new_scores = [item[1][0] for item in self.topk(100)]
 				if new_scores == old_scores:
 					patience += 1
 					if patience >= self.args.patience:
@@ -1,13 +1,11 @@
 """This module contains the Acquirer class, which is used to gather inputs for
 a subsequent round of exploration based on prior prediction data."""
 import heapq
-from itertools import chain
 import math
 from timeit import default_timer
-from typing import Dict, Iterable, List, Mapping, Optional, Set, TypeVar, Union
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, TypeVar, Union
 
 import numpy as np
-from tqdm import tqdm
 
 from main.molpal.molpal.acquirer import metrics
 
@@ -170,37 +168,36 @@ class Acquirer:
         List[T]
             the list of inputs to explore
         """
+        xs = list(xs)
+        idxs = self.acquire_initial_idxs(cluster_ids, cluster_sizes)
+
+        return [xs[i] for i in idxs]
+
+    def acquire_initial_idxs(
+        self,
+        cluster_ids: Optional[Iterable[int]] = None,
+        cluster_sizes: Optional[Mapping[int, int]] = None,
+    ) -> np.ndarray:
+        """Acquire the pool indices of an initial set of inputs to explore
+
+        See also
+        --------
+        acquire_initial
+        """
         U = metrics.random(np.empty(self.size))
 
         if cluster_ids is None and cluster_sizes is None:
-            heap = []
-            for x, u in tqdm(zip(xs, U), total=U.size, desc="Acquiring"):
-                if len(heap) < self.init_size:
-                    heapq.heappush(heap, (u, x))
-                else:
-                    heapq.heappushpop(heap, (u, x))
+            idxs = Acquirer.top_idxs(U, self.init_size)
         else:
-            d_cid_heap = {
-                cid: ([], math.ceil(self.init_size * cluster_size / U.size))
-                for cid, cluster_size in cluster_sizes.items()
-            }
-
-            for x, u, cid in tqdm(
-                zip(xs, U, cluster_ids), "Acquiring", U.size, disable=self.verbose < 1
-            ):
-                heap, heap_size = d_cid_heap[cid]
-                if len(heap) < heap_size:
-                    heapq.heappush(heap, (u, x))
-                else:
-                    heapq.heappushpop(heap, (u, x))
-
-            heaps = [heap for heap, _ in d_cid_heap.values()]
-            heap = list(chain(*heaps))
+            d_cid_idxs = Acquirer.top_idxs_by_cluster(
+                U, self.init_size, self.as_array(cluster_ids, int), cluster_sizes
+            )
+            idxs = np.concatenate([idxs for idxs, _ in d_cid_idxs.values()])
 
         if self.verbose > 0:
-            print(f"  Selected {len(heap)} initial samples")
+            print(f"  Selected {len(idxs)} initial samples")
 
-        return [x for _, x in heap]
+        return idxs
 
     def acquire_batch(
         self,
@@ -243,12 +240,60 @@ class Acquirer:
         List[T]
             a list of selected inputs
         """
-        if explored:
-            ys = list(explored.values())
-            Y = np.nan_to_num(np.array(ys, dtype=float), nan=-np.inf)
+        xs = list(xs)
+        explored = explored or {}
+        explored_mask = np.fromiter((x in explored for x in xs), bool, len(xs))
+
+        idxs = self.acquire_batch_idxs(
+            y_means, y_vars, explored_mask, list(explored.values()),
+            k, cluster_ids, cluster_sizes, t
+        )
+
+        return [xs[i] for i in idxs]
+
+    def acquire_batch_idxs(
+        self,
+        y_means: Iterable[float],
+        y_vars: Iterable[float],
+        explored_mask: Optional[np.ndarray] = None,
+        explored_scores: Optional[Iterable[Optional[float]]] = None,
+        k: int = 1,
+        cluster_ids: Optional[Iterable[int]] = None,
+        cluster_sizes: Optional[Mapping[int, int]] = None,
+        t: Optional[int] = None,
+        **kwargs,
+    ) -> np.ndarray:
+        """Acquire the pool indices of a batch of inputs to explore
+
+        Unlike acquire_batch, this never touches the inputs themselves: explored
+        inputs are masked out with a boolean array parallel to the pool and the
+        top of the batch is found with np.argpartition
+
+        Parameters
+        ----------
+        y_means : Iterable[float]
+            the predicted input values
+        y_vars : Iterable[float]
+            the variances of the predicted input values
+        explored_mask : Optional[np.ndarray] (Default = None)
+            a boolean array parallel to the pool that is True for explored inputs
+        explored_scores : Optional[Iterable[Optional[float]]] (Default = None)
+            the scores of the explored inputs. None entries are failures
+        k : int, default=1
+        cluster_ids : Optional[Iterable[int]] (Default = None)
+        cluster_sizes : Optional[Mapping[int, int]] (Default = None)
+        t : Optional[int] (Default = None)
+
+        Returns
+        -------
+        np.ndarray
+            the pool indices of the selected inputs
+        """
+        Y = np.array([] if explored_scores is None else list(explored_scores), dtype=float)
+        if Y.size > 0:
+            Y = np.nan_to_num(Y, nan=-np.inf)
             current_max = np.partition(Y, -k)[-k]
         else:
-            explored = {}
             current_max = float("-inf")
 
         try:
@@ -258,8 +303,8 @@ class Acquirer:
 
         begin = default_timer()
 
-        Y_mean = np.array(y_means)
-        Y_var = np.array(y_vars)
+        Y_mean = self.as_array(y_means, float)
+        Y_var = self.as_array(y_vars, float)
 
         if self.verbose > 1:
             print("Calculating acquisition utilities ...", end=" ")
@@ -286,54 +331,115 @@ class Acquirer:
             print(f"      Utility calculation took {mins}m {secs}s")
 
         if cluster_ids is None and cluster_sizes is None:
-            heap = []
-            for x, u in tqdm(zip(xs, U), "Acquiring", U.size, disable=self.verbose < 1):
-                if x in explored:
-                    continue
-
-                if len(heap) < batch_size:
-                    heapq.heappush(heap, (u, x))
-                else:
-                    heapq.heappushpop(heap, (u, x))
+            idxs = Acquirer.top_idxs(U, batch_size, explored_mask)
         else:
             # this is broken for e-greedy/pi/etc. approaches
             # the random indices are not distributed evenly amongst clusters
 
-            d_cid_heap = {
-                cid: ([], math.ceil(batch_size * cluster_size / U.size))
-                for cid, cluster_size in cluster_sizes.items()
-            }
-
-            global_pred_max = float("-inf")
-
-            for x, y_pred, u, cid in tqdm(
-                zip(xs, Y_mean, U, cluster_ids), total=U.size, desc="Acquiring"
-            ):
-                global_pred_max = max(y_pred, global_pred_max)
-
-                if x in explored:
-                    continue
-
-                heap, heap_size = d_cid_heap[cid]
-                if len(heap) < heap_size:
-                    heapq.heappush(heap, (u, x))
-                else:
-                    heapq.heappushpop(heap, (u, x))
+            d_cid_idxs = Acquirer.top_idxs_by_cluster(
+                U, batch_size, self.as_array(cluster_ids, int), cluster_sizes, explored_mask
+            )
 
             if self.temp_i and self.temp_f:
+                global_pred_max = Y_mean.max() if Y_mean.size > 0 else float("-inf")
+                d_cid_heap = {
+                    cid: (list(zip(U[idxs], idxs)), heap_size)
+                    for cid, (idxs, heap_size) in d_cid_idxs.items()
+                }
                 d_cid_heap = self.scale_heaps(d_cid_heap, global_pred_max, t)
+                d_cid_idxs = {
+                    cid: (np.array([i for _, i in heap], dtype=int), heap_size)
+                    for cid, (heap, heap_size) in d_cid_heap.items()
+                }
 
-            heaps = [heap for heap, _ in d_cid_heap.values()]
-            heap = list(chain(*heaps))
+            idxs = np.concatenate([idxs for idxs, _ in d_cid_idxs.values()])
 
         if self.verbose > 1:
-            print(f"Selected {len(heap)} new samples")
+            print(f"Selected {len(idxs)} new samples")
         if self.verbose > 2:
             total = default_timer() - begin
             mins, secs = divmod(int(total), 60)
             print(f"      Batch acquisition took {mins}m {secs}s")
 
-        return [x for _, x in heap]
+        return idxs
+
+    @staticmethod
+    def as_array(xs: Iterable, dtype) -> np.ndarray:
+        """Convert a (possibly lazy) iterable parallel to the pool into an array"""
+        if isinstance(xs, (np.ndarray, Sequence)):
+            return np.array(xs, dtype=dtype)
+        return np.fromiter(xs, dtype)
+
+    @staticmethod
+    def top_idxs(
+        U: np.ndarray, n: int, mask: Optional[np.ndarray] = None,
+        candidates: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Get the indices of the n highest utilities, highest first
+
+        Parameters
+        ----------
+        U : np.ndarray
+            the utility of each input in the pool
+        n : int
+            the number of indices to select
+        mask : Optional[np.ndarray] (Default = None)
+            a boolean array parallel to U that is True for inputs to skip
+        candidates : Optional[np.ndarray] (Default = None)
+            the indices to select from. By default, select from the whole pool
+
+        Returns
+        -------
+        np.ndarray
+            the selected indices
+        """
+        if candidates is None:
+            candidates = np.arange(U.size) if mask is None else np.flatnonzero(~mask)
+        elif mask is not None:
+            candidates = candidates[~mask[candidates]]
+
+        # NaN utilities sort as the lowest, like -inf
+        U_c = np.nan_to_num(U[candidates], nan=-np.inf, posinf=np.inf, neginf=-np.inf)
+        if n <= 0:
+            return candidates[:0]
+        if n < candidates.size:
+            top = np.argpartition(U_c, -n)[-n:]
+            candidates, U_c = candidates[top], U_c[top]
+
+        return candidates[np.argsort(-U_c, kind="stable")]
+
+    @staticmethod
+    def top_idxs_by_cluster(
+        U: np.ndarray, n: int, cluster_ids: np.ndarray,
+        cluster_sizes: Mapping[int, int], mask: Optional[np.ndarray] = None
+    ) -> Dict[int, Tuple[np.ndarray, int]]:
+        """Get the indices of the highest utilities in each cluster, where
+        each cluster receives a share of the n inputs proportional to its size
+
+        The pool is grouped by cluster ID with a single stable sort, after
+        which each group is handled with np.argpartition
+
+        Returns
+        -------
+        Dict[int, Tuple[np.ndarray, int]]
+            a mapping from cluster ID to the selected indices in that cluster
+            and the cluster's share of the batch
+        """
+        order = np.argsort(cluster_ids, kind="stable")
+        sorted_cids = cluster_ids[order]
+        cids, starts = np.unique(sorted_cids, return_index=True)
+        ends = np.append(starts[1:], sorted_cids.size)
+        d_cid_group = {
+            cid: order[start:end] for cid, start, end in zip(cids.tolist(), starts, ends)
+        }
+
+        d_cid_idxs = {}
+        for cid, cluster_size in cluster_sizes.items():
+            heap_size = math.ceil(n * cluster_size / U.size)
+            group = d_cid_group.get(cid, order[:0])
+            d_cid_idxs[cid] = (Acquirer.top_idxs(U, heap_size, mask, group), heap_size)
+
+        return d_cid_idxs
 
     def scale_heaps(self, d_cid_heap: Dict[int, List], global_pred_max: float, it: int):
         """Scale each heap's size based on a decay factor
@@ -83,7 +83,7 @@ def add_encoder_args(parser: ArgumentParser) -> None:
 ##############################
 def add_pool_args(parser: ArgumentParser) -> None:
     parser.add_argument('--pool', default='eager',
-                        help='the type of MoleculePool to use')
+                        help='the type of MoleculePool to use: eager, lazy or memmap')
     parser.add_argument('-l', '--libraries', '--library',
                         default=['data/zinc.csv.gz'], nargs='+',
                         help='the CSVs containing members of the MoleculePool')
@@ -101,6 +101,8 @@ def add_pool_args(parser: ArgumentParser) -> None:
                         help='whether to cluster the MoleculePool')
     parser.add_argument('--cache', action='store_true', default=False,
                         help='whether to store the SMILES strings of the MoleculePool in memory')
+    parser.add_argument('--smiles-store', action='store_true', default=False,
+                        help='whether to keep the SMILES strings of the MoleculePool in an on-disk column store next to the fingerprints file')
     parser.add_argument('--invalid-idxs', '--invalid-lines',
                         type=int, nargs='*',
                         help='the indices in the overall library (potentially consisting of multiple library files) containing invalid SMILES strings')
@@ -159,6 +161,20 @@ def add_model_args(parser: ArgumentParser) -> None:
     parser.add_argument('--retrain-from-scratch',
                         action='store_true', default=False,
                         help='whether the model should be retrained from scratch at each iteration as opposed to retraining online.')
+    parser.add_argument('--warm-start', action='store_true', default=False,
+                        help='whether to fine-tune the current NN/MPNN weights at each iteration on the new scores mixed with a replay sample of older scores. Ignored if --retrain-from-scratch is specified.')
+    parser.add_argument('--replay-ratio', type=float, default=1.,
+                        help='the size of the replay sample of older scores used when warm-starting, relative to the number of new scores')
+    parser.add_argument('--fine-tune-epochs', type=int, default=10,
+                        help='the maximum number of epochs to train for when warm-starting a NN/MPNN model')
+    parser.add_argument('--pred-tol', type=float, default=0.,
+                        help='skip re-predicting the pool if no prediction over a probe subset of the pool moved by more than this fraction of the standard deviation of the current predictions. A value of 0 always re-predicts the full pool')
+    parser.add_argument('--probe-size', type=int, default=10000,
+                        help='the size of the probe subset used to detect changes in the predictions')
+    parser.add_argument('--sharded-inference', action='store_true', default=False,
+                        help='whether to predict the pool in shards over parallel model replicas, writing the predictions to memory-mapped files. Requires a pool that can read its inputs by index range from disk, i.e., a pool with a SMILES store or precalculated fingerprints')
+    parser.add_argument('--inference-workers', type=int,
+                        help='the number of model replicas to use for sharded inference. By default, one for each CPU in the ray cluster')
     parser.add_argument('--model-seed', type=int,
                         help='the random seed to use for model initialization. Not specifying will result in random model initializations each time the model is trained.')
     
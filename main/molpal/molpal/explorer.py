@@ -4,7 +4,9 @@ from collections.abc import Iterable
 import csv
 import heapq
 import json
+import math
 from operator import itemgetter
+import os
 from pathlib import Path
 import pickle
 from typing import Dict, List, Optional, Tuple, TypeVar, Union
@@ -37,6 +39,24 @@ class Explorer:
         whether the model will be retrained from scratch at each iteration.
         If False, train the model online.
         NOTE: The definition of 'online' is model-specific.
+    warm_start : bool
+        whether to fine-tune the current model weights at each iteration on
+        the newly acquired scores mixed with a replay sample of older scores
+    replay_ratio : float
+        the size of the replay sample relative to the number of new scores
+    pred_tol : float
+        the tolerance, relative to the spread of the current predictions, below
+        which the change in predictions over the probe subset is considered
+        negligible and full-pool inference is skipped. A value of 0 always
+        re-predicts the full pool
+    probe_idxs : Optional[np.ndarray]
+        the sorted pool indices of the probe subset
+    sharded_inference : bool
+        whether to predict the pool in shards over parallel model replicas,
+        writing the predictions to memory-mapped files under path/preds. Only
+        used if the pool can read its inputs by index range from disk
+    inference_workers : Optional[int]
+        the number of model replicas used for sharded inference
     iter : int
         the current iteration of exploration. I.e., the loop iteration the
         explorer has yet to start. This means that the current predictions will
@@ -64,6 +84,9 @@ class Explorer:
     Y_var : np.ndarray
         a list parallel to the pool containing the variance in the predicted
         score for an input. Will be empty if model does not provide variance
+    explored_mask : Optional[np.ndarray]
+        a boolean array parallel to the pool that is True for explored inputs.
+        None if it must be rebuilt from the explored SMILES strings
     recent_avgs : List[float]
         a list containing the recent top-k averages
     delta : float
@@ -102,6 +125,13 @@ class Explorer:
     write_intermediate : bool, default=False
     save_preds : bool, default=False
     retrain_from_scratch : bool, default=False
+    warm_start : bool, default=False
+    replay_ratio : float, default=1.
+    pred_tol : float, default=0.
+    probe_size : int, default=10000
+        the number of pool inputs used to detect changes in the predictions
+    sharded_inference : bool, default=False
+    inference_workers : Optional[int], default=None
     previous_scores : Optional[str], default=None
         the filepath of a CSV file containing previous scoring data which will
         be treated as the initialization batch (instead of randomly selecting
@@ -116,6 +146,8 @@ class Explorer:
     ValueError
         if k is less than 0
         if budget is less than 0
+    IncompatibilityError
+        if warm_start is True and the model does not support warm-starting
     """
     def __init__(self, oracle, path: Union[str, Path] = "molpal",
                  k: Union[int, float] = 0.01, window_size: int = 3,
@@ -124,6 +156,10 @@ class Explorer:
                  write_final: bool = True, write_intermediate: bool = False,
                  chkpt_freq: int = 0, checkpoint_file: Optional[str] = None,
                  retrain_from_scratch: bool = False,
+                 warm_start: bool = False, replay_ratio: float = 1.,
+                 pred_tol: float = 0., probe_size: int = 10000,
+                 sharded_inference: bool = False,
+                 inference_workers: Optional[int] = None,
                  previous_scores: Optional[str] = None,
                  **kwargs):
         args = locals()
@@ -144,10 +180,18 @@ class Explorer:
         self.model = models.model(input_size=len(self.featurizer), **kwargs)
         self.acquirer.stochastic_preds = 'stochastic' in self.model.provides
         self.retrain_from_scratch = retrain_from_scratch
+        self.warm_start = warm_start
+        self.replay_ratio = replay_ratio
+        self.pred_tol = pred_tol
+        self.probe_size = probe_size
+        self.probe_idxs = None
+        self.sharded_inference = sharded_inference
+        self.inference_workers = inference_workers
 
         self.objective = oracle
 
         self._validate_acquirer()
+        self._validate_warm_start()
 
         # stopping attributes
         self.k = k
@@ -172,6 +216,7 @@ class Explorer:
         self.recent_avgs = []
         self.Y_pred = np.array([])
         self.Y_var = np.array([])
+        self.explored_mask = None
 
         if previous_scores:
             self.load_scores(previous_scores)
@@ -346,11 +391,11 @@ class Explorer:
         avg : float
             the average score of the batch
         """
-        inputs = self.acquirer.acquire_initial(
-            xs=self.pool.smis(),
+        idxs = self.acquirer.acquire_initial_idxs(
             cluster_ids=self.pool.cluster_ids(),
             cluster_sizes=self.pool.cluster_sizes,
         )
+        inputs = self._acquired_inputs(idxs)
 
         # import ipdb; ipdb.set_trace()
 
@@ -399,12 +444,14 @@ class Explorer:
         self._update_model()
         self._update_predictions()
 
-        inputs = self.acquirer.acquire_batch(
-            xs=self.pool.smis(), y_means=self.Y_pred, y_vars=self.Y_var,
-            explored={**self.scores, **self.failures},
+        idxs = self.acquirer.acquire_batch_idxs(
+            y_means=self.Y_pred, y_vars=self.Y_var,
+            explored_mask=self._explored_mask(),
+            explored_scores=[*self.scores.values(), *self.failures.values()],
             cluster_ids=self.pool.cluster_ids(),
             cluster_sizes=self.pool.cluster_sizes, t=(self.iter-1),
         )
+        inputs = self._acquired_inputs(idxs)
 
         new_scores_scores = self.objective(inputs)
         new_scores = {inputs[i]: new_scores_scores[i] for i in range(len(inputs))}
@@ -578,6 +625,7 @@ class Explorer:
 
         self.scores.update(scores)
         self.failures.update(failures)
+        self.explored_mask = None
         
         if self.iter == 0:
             self.iter = 1
@@ -647,6 +695,7 @@ class Explorer:
 
         self.scores = pickle.load(open(state['scores'], 'rb'))
         self.failures = pickle.load(open(state['failures'], 'rb'))
+        self.explored_mask = None
         self.new_scores = pickle.load(open(state['new_scores'], 'rb'))
         self.adjustment = state['adjustment']
         
@@ -708,6 +757,30 @@ class Explorer:
                 self.scores[x] = y
                 self.new_scores[x] = y
 
+    def _explored_mask(self) -> np.ndarray:
+        """Get the boolean array parallel to the pool that is True for explored
+        inputs, rebuilding it from the explored SMILES strings if necessary"""
+        if self.explored_mask is None:
+            explored = {**self.scores, **self.failures}
+            if self.pool.smis_store_ is not None:
+                self.explored_mask = np.zeros(len(self.pool), dtype=bool)
+                for smi in explored:
+                    self.explored_mask[self.pool.get_idxs(smi)] = True
+            else:
+                self.explored_mask = np.fromiter(
+                    (smi in explored for smi in self.pool.smis()), bool, len(self.pool)
+                )
+
+        return self.explored_mask
+
+    def _acquired_inputs(self, idxs: np.ndarray) -> List[str]:
+        """Mark the acquired pool indices as explored and get their SMILES strings"""
+        self._explored_mask()[idxs] = True
+        if len(idxs) == 0:
+            return []
+
+        return self.pool.get_smis(idxs.tolist())
+
     def _update_model(self):
         """Update the prior distribution to generate a posterior distribution
 
@@ -725,18 +798,45 @@ class Explorer:
             self.updated_model = False
             return
 
+        warm_start = self.warm_start and not self.retrain_from_scratch
         if self.retrain_from_scratch:
             xs, ys = zip(*self.scores.items())
+        elif warm_start:
+            xs, ys = self._replay_mix()
         else:
             xs, ys = zip(*self.new_scores.items())
 
-        self.model.train(
-            xs, np.array(ys), retrain=self.retrain_from_scratch,
-            featurizer=self.featurizer,
-        )
+        if warm_start:
+            self.model.train(
+                xs, np.array(ys), retrain=False,
+                featurizer=self.featurizer, warm_start=True
+            )
+        else:
+            self.model.train(
+                xs, np.array(ys), retrain=self.retrain_from_scratch,
+                featurizer=self.featurizer,
+            )
         self.new_scores = {}
         self.updated_model = True
 
+    def _replay_mix(self) -> Tuple[List[str], List[float]]:
+        """The new scores together with a random sample of the older scores
+        of size replay_ratio * len(self.new_scores), so that fine-tuning on the
+        new data does not overwrite what the model has learned from the old"""
+        xs, ys = map(list, zip(*self.new_scores.items()))
+
+        old_xs = [x for x in self.scores if x not in self.new_scores]
+        n_replay = min(
+            len(old_xs), int(math.ceil(self.replay_ratio * len(xs)))
+        )
+        if n_replay > 0:
+            replay_idxs = np.random.choice(len(old_xs), n_replay, replace=False)
+            for i in replay_idxs:
+                xs.append(old_xs[i])
+                ys.append(self.scores[old_xs[i]])
+
+        return xs, ys
+
     def _update_predictions(self):
         """Update the predictions over the pool with the new model
 
@@ -758,13 +858,82 @@ class Explorer:
                      'predictions were set. Skipping update!')
             return
 
+        mean_only = 'vars' not in self.acquirer.needs
+        if self.pred_tol > 0 and self.Y_pred.size == len(self.pool):
+            if self._predictions_unchanged(mean_only):
+                if self.verbose > 1:
+                    print('Predictions over the probe subset are unchanged. ',
+                          'Skipping update!')
+                self.updated_model = False
+                return
+
+        if self.sharded_inference:
+            read_range = self.pool.range_reader(smiles=self.model.type_ == 'mpn')
+            if read_range is not None:
+                # the previous predictions are superseded, so their files go
+                for Y in (self.Y_pred, self.Y_var):
+                    if isinstance(Y, np.memmap):
+                        os.remove(Y.filename)
+
+                self.Y_pred, self.Y_var = self.model.apply_sharded(
+                    read_range, len(self.pool),
+                    self.path / 'preds' / f'iter_{self.iter}',
+                    mean_only=mean_only, num_workers=self.inference_workers,
+                    verbose=self.verbose
+                )
+                self.updated_model = False
+                return
+
+        if isinstance(self.pool, pools.MemmapMoleculePool):
+            # whole batches unpacked straight from the memory map
+            x_feats = self.pool.fps_batches()
+            batched_size = self.pool.chunk_size
+        else:
+            x_feats = self.pool.fps()
+            batched_size = None
+
         self.Y_pred, self.Y_var = self.model.apply(
-            x_ids=self.pool.smis(), x_feats=self.pool.fps(), 
-            batched_size=None, size=len(self.pool), 
-            mean_only='vars' not in self.acquirer.needs
+            x_ids=self.pool.smis(), x_feats=x_feats, 
+            batched_size=batched_size, size=len(self.pool), 
+            mean_only=mean_only
         )
 
         self.updated_model = False
+
+    def _predictions_unchanged(self, mean_only: bool) -> bool:
+        """Predict the probe subset with the current model and test whether
+        its predictions moved by no more than pred_tol times the spread of the
+        current predictions. If so, the probe predictions are written into
+        self.Y_pred and self.Y_var"""
+        if self.probe_idxs is None:
+            n_probe = min(self.probe_size, len(self.pool))
+            self.probe_idxs = np.sort(
+                np.random.choice(len(self.pool), n_probe, replace=False)
+            )
+        idxs = self.probe_idxs.tolist()
+
+        Y_pred, Y_var = self.model.apply(
+            x_ids=self.pool.get_smis(idxs), x_feats=self.pool.get_fps(idxs),
+            size=len(idxs), mean_only=mean_only
+        )
+
+        Y_pred_old = self.Y_pred[self.probe_idxs]
+        tol = self.pred_tol * Y_pred_old.std()
+        if np.abs(Y_pred - Y_pred_old).max() > tol:
+            return False
+
+        if not mean_only:
+            if self.Y_var.size != len(self.pool):
+                return False
+            Y_sd_old = np.sqrt(self.Y_var[self.probe_idxs])
+            if np.abs(np.sqrt(Y_var) - Y_sd_old).max() > tol:
+                return False
+
+        self.Y_pred[self.probe_idxs] = Y_pred
+        if not mean_only:
+            self.Y_var[self.probe_idxs] = Y_var
+
+        return True
         
     def _validate_acquirer(self):
         """Ensure that the model provides values the Acquirer needs"""
@@ -775,6 +944,12 @@ class Explorer:
                 + f'but {self.model.type_} only provides: '
                 + f'{self.model.provides}')
 
+    def _validate_warm_start(self):
+        """Ensure that the model can be warm-started, if necessary"""
+        if self.warm_start and self.model.type_ not in {'nn', 'mpn'}:
+            raise IncompatibilityError(
+                f'{self.model.type_} model does not support warm-starting')
+
     def _read_scores(self, scores_csv: str) -> Tuple[Dict, Dict]:
         """read the scores contained in the file located at scores_csv"""
         scores = {}
@@ -1,9 +1,16 @@
 """This module contains the Model abstract base class. All custom models must
 implement this interface in order to interact properly with an Explorer"""
 from abc import ABC, abstractmethod
-from typing import Callable, Iterable, Optional, Sequence, Set, Tuple, TypeVar
+import math
+from pathlib import Path
+import time
+from typing import (
+    Callable, Iterable, Optional, Sequence, Set, Tuple, TypeVar, Union
+)
 
 import numpy as np
+import ray
+from ray.util import ActorPool
 from tqdm import tqdm
 
 from main.molpal.molpal.utils import batches
@@ -150,6 +157,98 @@ class Model(ABC):
                 variancess.append(variances)
 
         return np.concatenate(meanss), np.concatenate(variancess)
+
+    def apply_sharded(
+        self, read_range: Callable[[int, int], Sequence], size: int,
+        path: Union[str, Path], mean_only: bool = True,
+        num_workers: Optional[int] = None, shard_size: Optional[int] = None,
+        verbose: int = 0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Apply the model to the inputs in shards of contiguous index ranges
+        that are predicted in parallel by ray actors holding a replica of this
+        model
+
+        Each actor reads the inputs of its shard with read_range, predicts them
+        test_batch_size inputs at a time, and writes the predictions directly
+        into preallocated float32 memory maps, so neither the inputs nor the
+        predictions of the full pool are ever held in memory at once.
+
+        Parameters
+        ----------
+        read_range : Callable[[int, int], Sequence]
+            a picklable function that returns the inputs in the index range
+            [start, stop). See MoleculePool.range_reader
+        size : int
+            the total number of inputs
+        path : Union[str, Path]
+            the path prefix of the memory-mapped files of the predictions,
+            which are written to '{path}_Y_pred.f32' and '{path}_Y_var.f32'
+        mean_only : bool (Default = True)
+            whether to generate the predicted variance in addition to the mean
+        num_workers : Optional[int] (Default = None)
+            the number of model replicas. By default, one for each CPU in the
+            ray cluster
+        shard_size : Optional[int] (Default = None)
+            the number of inputs in each shard. By default, the inputs are
+            split into four shards for each worker
+        verbose : int (Default = 0)
+            print the throughput of each shard if greater than 0
+
+        Returns
+        -------
+        means : np.ndarray
+            a memory map of the mean predicted values
+        variances: np.ndarray
+            a memory map of the variance in the predicted means, empty if
+            mean_only is True
+        """
+        if size == 0:
+            return np.array([], dtype=np.float32), np.array([])
+
+        num_workers = num_workers or int(ray.cluster_resources()['CPU'])
+        shard_size = shard_size or math.ceil(size / (4 * num_workers))
+        shards = [
+            (start, min(start + shard_size, size))
+            for start in range(0, size, shard_size)
+        ]
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        p_pred = path.with_name(f'{path.name}_Y_pred.f32')
+        p_var = None if mean_only else path.with_name(f'{path.name}_Y_var.f32')
+
+        # allocate the output files up front so that workers can write to them
+        for p in filter(None, (p_pred, p_var)):
+            with open(p, 'wb') as fid:
+                fid.truncate(4 * size)
+
+        model = ray.put(self)
+        workers = ActorPool([
+            _InferenceWorker.remote(model, read_range, size, p_pred, p_var)
+            for _ in range(min(num_workers, len(shards)))
+        ])
+        results = workers.map_unordered(
+            lambda w, shard: w.predict.remote(*shard), shards
+        )
+
+        bar = tqdm(
+            total=size, desc='Inference', smoothing=0., unit='smi'
+        )
+        for start, stop, t in results:
+            bar.update(stop - start)
+            if verbose > 0:
+                tqdm.write(
+                    f'Shard [{start}, {stop}): {(stop-start)/t:0.1f} inputs/s'
+                )
+        bar.close()
+
+        Y_pred = np.memmap(p_pred, dtype=np.float32, mode='r+', shape=(size,))
+        if mean_only:
+            Y_var = np.array([])
+        else:
+            Y_var = np.memmap(p_var, dtype=np.float32, mode='r+', shape=(size,))
+
+        return Y_pred, Y_var
     
     @abstractmethod
     def save(self, path) -> str:
@@ -158,3 +257,37 @@ class Model(ABC):
     @abstractmethod
     def load(self, path):
         """load the model from path"""
+
+
+@ray.remote
+class _InferenceWorker:
+    """A replica of a model that predicts shards of inputs into the memory
+    maps of the predictions. See Model.apply_sharded"""
+    def __init__(self, model: Model, read_range: Callable[[int, int], Sequence],
+                 size: int, p_pred: Path, p_var: Optional[Path]):
+        self.model = model
+        self.read_range = read_range
+        self.Y_pred = np.memmap(p_pred, dtype=np.float32, mode='r+', shape=(size,))
+        if p_var is None:
+            self.Y_var = None
+        else:
+            self.Y_var = np.memmap(p_var, dtype=np.float32, mode='r+', shape=(size,))
+
+    def predict(self, start: int, stop: int) -> Tuple[int, int, float]:
+        """Predict the inputs in [start, stop) and return the range along with
+        the time it took"""
+        t0 = time.time()
+        batch_size = self.model.test_batch_size
+        for i in range(start, stop, batch_size):
+            j = min(i + batch_size, stop)
+            xs = self.read_range(i, j)
+            if self.Y_var is None:
+                self.Y_pred[i:j] = self.model.get_means(xs)
+            else:
+                self.Y_pred[i:j], self.Y_var[i:j] = self.model.get_means_and_vars(xs)
+
+        self.Y_pred.flush()
+        if self.Y_var is not None:
+            self.Y_var.flush()
+
+        return start, stop, time.time() - t0
@@ -91,7 +91,8 @@ class MPNN:
                  init_lr: float = 1e-4, max_lr: float = 1e-3,
                  final_lr: float = 1e-4, ncpu: int = 1,
                  ddp: bool = False, precision: int = 32,
-                 model_seed: Optional[int] = None):
+                 model_seed: Optional[int] = None,
+                 fine_tune_epochs: int = 10):
         self.ncpu = ncpu
         self.ddp = ddp
         if precision not in (16, 32):
@@ -114,6 +115,7 @@ class MPNN:
         self.num_tasks = num_tasks
 
         self.epochs = epochs
+        self.fine_tune_epochs = fine_tune_epochs
         self.batch_size = batch_size
 
         self.scaler = None
@@ -145,17 +147,39 @@ class MPNN:
             'metric': metric,
         }
 
-    def train(self, smis: Iterable[str], targets: Sequence[float]) -> bool:
-        """Train the model on the inputs SMILES with the given targets"""
-        train_data, val_data = self.make_datasets(smis, targets)
-        
+    def train(
+        self, smis: Iterable[str], targets: Sequence[float],
+        warm_start: bool = False
+    ) -> bool:
+        """Train the model on the inputs SMILES with the given targets
+
+        If warm_start is True and the model has been trained before, fine-tune
+        the current weights for at most fine_tune_epochs epochs at the initial
+        learning rate, keeping the current target scaler"""
+        warm_start = warm_start and self.scaler is not None
+        train_data, val_data = self.make_datasets(
+            smis, targets, self.scaler if warm_start else None
+        )
+
+        train_config = self.train_config
+        max_epochs = self.epochs
+        patience = 10
+        if warm_start:
+            max_epochs = self.fine_tune_epochs
+            patience = 3
+            train_config = {
+                **train_config,
+                'max_epochs': max_epochs,
+                'max_lr': train_config['init_lr'],
+            }
+
         if self.ddp:
-            self.train_config['train_data'] = train_data
-            self.train_config['val_data'] = val_data
+            train_config['train_data'] = train_data
+            train_config['val_data'] = val_data
 
             trainer = Trainer("torch", self.num_workers, self.use_gpu, {"CPU": self.ncpu})
             trainer.start()
-            results = trainer.run(mpnn.sgd.train_func, self.train_config)
+            results = trainer.run(mpnn.sgd.train_func, train_config)
             trainer.shutdown()
 
             self.model = results[0]
@@ -171,15 +195,15 @@ class MPNN:
             num_workers=self.ncpu, pin_memory=False
         )
         
-        lit_model = mpnn.LitMPNN(self.train_config)
+        lit_model = mpnn.LitMPNN(train_config)
         
         callbacks = [
-            EarlyStopping('val_loss', patience=10, mode='min'),
+            EarlyStopping('val_loss', patience=patience, mode='min'),
             mpnn.EpochAndStepProgressBar()
         ]
         trainer = pl.Trainer(
             logger=False,
-            max_epochs=self.epochs,
+            max_epochs=max_epochs,
             callbacks=callbacks,
             gpus=1 if self.use_gpu else 0,
             precision=self.precision,
@@ -191,9 +215,11 @@ class MPNN:
         return True
 
     def make_datasets(
-            self, xs: Iterable[str], ys: Sequence[float]
+            self, xs: Iterable[str], ys: Sequence[float],
+            scaler: Optional[StandardScaler] = None
         ) -> Tuple[MoleculeDataset, MoleculeDataset]:
-        """Split xs and ys into train and validation datasets"""
+        """Split xs and ys into train and validation datasets, scaling the
+        targets with scaler or, if None, with a scaler fit to the train data"""
         if len(ys.shape) == 1:
             data = MoleculeDataset([
                 MoleculeDatapoint(smiles=[x], targets=[y])
@@ -208,7 +234,10 @@ class MPNN:
             data=data, sizes=(0.8, 0.2, 0.0), seed=self.seed
         )
 
-        self.scaler = train_data.normalize_targets()    
+        if scaler is None:
+            self.scaler = train_data.normalize_targets()
+        else:
+            train_data.scale_targets(scaler)
         val_data.scale_targets(self.scaler)
 
         return train_data, val_data
@@ -278,11 +307,13 @@ class MPNModel(Model):
     passes these inputs to a feed-forward neural network to predict means"""
     def __init__(self, test_batch_size: Optional[int] = 1000000,
                  ncpu: int = 1, ddp: bool = False, precision: int = 32, 
-                 model_seed: Optional[int] = None, **kwargs):
+                 model_seed: Optional[int] = None, fine_tune_epochs: int = 10,
+                 **kwargs):
         test_batch_size = test_batch_size or 1000000
 
         self.build_model = partial(
-            MPNN, ncpu=ncpu, ddp=ddp, precision=precision, model_seed=model_seed
+            MPNN, ncpu=ncpu, ddp=ddp, precision=precision, model_seed=model_seed,
+            fine_tune_epochs=fine_tune_epochs
         )
         self.model = self.build_model()
 
@@ -297,11 +328,12 @@ class MPNModel(Model):
         return 'mpn'
 
     def train(self, xs: Iterable[str], ys: Sequence[float], *,
-              retrain: bool = False, **kwargs) -> bool:
+              retrain: bool = False, warm_start: bool = False,
+              **kwargs) -> bool:
         if retrain:
             self.model = self.build_model()
 
-        return self.model.train(xs, ys)
+        return self.model.train(xs, ys, warm_start)
 
     def get_means(self, xs: Sequence[str]) -> np.ndarray:
         preds = self.model.predict(xs)
@@ -322,12 +354,14 @@ class MPNDropoutModel(Model):
     def __init__(self, test_batch_size: Optional[int] = 1000000,
                  dropout: float = 0.2, dropout_size: int = 10,
                  ncpu: int = 1, ddp: bool = False, precision: int = 32,
-                 model_seed: Optional[int] = None, **kwargs):
+                 model_seed: Optional[int] = None, fine_tune_epochs: int = 10,
+                 **kwargs):
         test_batch_size = test_batch_size or 1000000
 
         self.build_model = partial(
             MPNN, uncertainty='dropout', dropout=dropout, 
-            ncpu=ncpu, ddp=ddp, precision=precision, model_seed=model_seed
+            ncpu=ncpu, ddp=ddp, precision=precision, model_seed=model_seed,
+            fine_tune_epochs=fine_tune_epochs
         )
         self.model = self.build_model()
 
@@ -344,11 +378,12 @@ class MPNDropoutModel(Model):
         return {'means', 'vars', 'stochastic'}
 
     def train(self, xs: Iterable[str], ys: Sequence[float], *,
-              retrain: bool = False, **kwargs) -> bool:
+              retrain: bool = False, warm_start: bool = False,
+              **kwargs) -> bool:
         if retrain:
             self.model = self.build_model()
 
-        return self.model.train(xs, ys)
+        return self.model.train(xs, ys, warm_start)
 
     def get_means(self, xs: Sequence[str]) -> np.ndarray:
         predss = self._get_predictions(xs)
@@ -377,12 +412,14 @@ class MPNTwoOutputModel(Model):
     through mean-variance estimation"""
     def __init__(self, test_batch_size: Optional[int] = 1000000,
                  ncpu: int = 1, ddp: bool = False, precision: int = 32,
-                 model_seed: Optional[int] = None, **kwargs):
+                 model_seed: Optional[int] = None, fine_tune_epochs: int = 10,
+                 **kwargs):
         test_batch_size = test_batch_size or 1000000
 
         self.build_model = partial(
             MPNN, uncertainty='mve', ncpu=ncpu,
-            ddp=ddp, precision=precision, model_seed=model_seed
+            ddp=ddp, precision=precision, model_seed=model_seed,
+            fine_tune_epochs=fine_tune_epochs
         )
         self.model = self.build_model()
 
@@ -397,11 +434,12 @@ class MPNTwoOutputModel(Model):
         return {'means', 'vars'}
 
     def train(self, xs: Iterable[str], ys: Sequence[float], *,
-              retrain: bool = False, **kwargs) -> bool:
+              retrain: bool = False, warm_start: bool = False,
+              **kwargs) -> bool:
         if retrain:
             self.model = self.build_model()
 
-        return self.model.train(xs, ys)
+        return self.model.train(xs, ys, warm_start)
 
     def get_means(self, xs: Sequence[str]) -> np.ndarray:
         means, _ = self._get_predictions(xs)
@@ -75,6 +75,8 @@ class NN:
     activation : Optional[str], default='relu'
         the name of the activation function to use
     uncertainty : Optional[str], default=None
+    fine_tune_epochs : int, default=10
+        the maximum number of epochs when warm-starting from the current weights
     """
     def __init__(self, input_size: int, num_tasks: int,
                  batch_size: int = 4096,
@@ -82,9 +84,11 @@ class NN:
                  dropout: Optional[float] = None,
                  activation: Optional[str] = 'relu',
                  uncertainty: Optional[str] = None,
-                 model_seed: Optional[int] = None):
+                 model_seed: Optional[int] = None,
+                 fine_tune_epochs: int = 10):
         self.input_size = input_size
         self.batch_size = batch_size
+        self.fine_tune_epochs = fine_tune_epochs
 
         self.uncertainty = uncertainty
 
@@ -141,7 +145,8 @@ class NN:
         return model, optimizer, loss
 
     def train(self, xs: Iterable[T], ys: Iterable[float],
-              featurizer: Callable[[T], ndarray]) -> bool:
+              featurizer: Callable[[T], ndarray],
+              warm_start: bool = False) -> bool:
         """Train the model on xs and ys with the given featurizer
 
         Parameters
@@ -153,6 +158,9 @@ class NN:
         featurize : Callable[[T], ndarray]
             a function that transforms an identifier into its uncompressed
             feature representation
+        warm_start : bool, default=False
+            whether to fine-tune the current weights for at most
+            fine_tune_epochs epochs, keeping the current target normalization
         
         Returns
         -------
@@ -161,11 +169,16 @@ class NN:
         self.model.compile(optimizer=self.optimizer, loss=self.loss)
 
         X = np.array(feature_matrix(xs, featurizer))
-        Y = self._normalize(ys)
+        if warm_start and np.all(self.std > 0):
+            Y = (np.stack(list(ys)) - self.mean) / self.std
+            epochs = self.fine_tune_epochs
+        else:
+            Y = self._normalize(ys)
+            epochs = 50
 
         self.model.fit(
             X, Y, batch_size=self.batch_size, validation_split=0.2,
-            epochs=50, validation_freq=2, verbose=0,
+            epochs=epochs, validation_freq=2, verbose=0,
             callbacks=[
                 keras.callbacks.EarlyStopping(
                     monitor='val_loss', patience=5,
@@ -256,13 +269,15 @@ class NNModel(Model):
     def __init__(self, input_size: int, test_batch_size: Optional[int] = 4096,
                  dropout: Optional[float] = 0.0,
                  model_seed: Optional[int] = None,
+                 fine_tune_epochs: int = 10,
                  **kwargs):
         test_batch_size = test_batch_size or 4096
 
         self.build_model = partial(
             NN, input_size=input_size, num_tasks=1,
             batch_size=test_batch_size, dropout=dropout,
-            model_seed=model_seed
+            model_seed=model_seed,
+            fine_tune_epochs=fine_tune_epochs
         )
         self.model = self.build_model()
 
@@ -277,11 +292,12 @@ class NNModel(Model):
         return 'nn'
 
     def train(self, xs: Iterable[T], ys: Sequence[Optional[float]], *,
-              featurizer: Featurizer, retrain: bool = False) -> bool:
+              featurizer: Featurizer, retrain: bool = False,
+              warm_start: bool = False) -> bool:
         if retrain:
             self.model = self.build_model()
 
-        return self.model.train(xs, ys, featurizer)
+        return self.model.train(xs, ys, featurizer, warm_start)
 
     def get_means(self, xs: List) -> ndarray:
         return self.model.predict(xs)[:, 0]
@@ -321,12 +337,14 @@ class NNEnsembleModel(Model):
     def __init__(self, input_size: int, test_batch_size: Optional[int] = 4096,
                  dropout: Optional[float] = 0.0, ensemble_size: int = 5,
                  bootstrap_ensemble: Optional[bool] = False,
-                 model_seed: Optional[int] = None, **kwargs):
+                 model_seed: Optional[int] = None, fine_tune_epochs: int = 10,
+                 **kwargs):
         test_batch_size = test_batch_size or 4096
         self.build_model = partial(
             NN, input_size=input_size, num_tasks=1,
             batch_size=test_batch_size, dropout=dropout,
-            model_seed=model_seed
+            model_seed=model_seed,
+            fine_tune_epochs=fine_tune_epochs
         )
 
         self.ensemble_size = ensemble_size
@@ -345,13 +363,16 @@ class NNEnsembleModel(Model):
         return {'means', 'vars'}
 
     def train(self, xs: Iterable[T], ys: Sequence[Optional[float]], *,
-              featurizer: Featurizer, retrain: bool = False):
+              featurizer: Featurizer, retrain: bool = False,
+              warm_start: bool = False):
         if retrain:
             self.models = [
                 self.build_model() for _ in range(self.ensemble_size)
             ]
 
-        return all([model.train(xs, ys, featurizer) for model in self.models])
+        return all([
+            model.train(xs, ys, featurizer, warm_start) for model in self.models
+        ])
 
     def get_means(self, xs: Sequence) -> np.ndarray:
         preds = np.zeros((len(xs), len(self.models)))
@@ -402,13 +423,15 @@ class NNTwoOutputModel(Model):
                  test_batch_size: Optional[int] = 4096,
                  dropout: Optional[float] = 0.0,
                  model_seed: Optional[int] = None,
+                 fine_tune_epochs: int = 10,
                  **kwargs):
         test_batch_size = test_batch_size or 4096
 
         self.build_model = partial(
             NN, input_size=input_size, num_tasks=1,
             batch_size=test_batch_size, dropout=dropout,
-            uncertainty='mve', model_seed=model_seed
+            uncertainty='mve', model_seed=model_seed,
+            fine_tune_epochs=fine_tune_epochs
         )
         self.model = self.build_model()
 
@@ -423,11 +446,12 @@ class NNTwoOutputModel(Model):
         return {'means', 'vars'}
 
     def train(self, xs: Iterable[T], ys: Sequence[Optional[float]], *,
-              featurizer: Featurizer, retrain: bool = False) -> bool:
+              featurizer: Featurizer, retrain: bool = False,
+              warm_start: bool = False) -> bool:
         if retrain:
             self.model = self.build_model()
 
-        return self.model.train(xs, ys, featurizer)
+        return self.model.train(xs, ys, featurizer, warm_start)
 
     def get_means(self, xs: Sequence) -> np.ndarray:
         preds = self.model.predict(xs)
@@ -471,13 +495,15 @@ class NNDropoutModel(Model):
     """
     def __init__(self, input_size: int, test_batch_size: Optional[int] = 4096,
                  dropout: Optional[float] = 0.2, dropout_size: int = 10,
-                 model_seed: Optional[int] = None, **kwargs):
+                 model_seed: Optional[int] = None, fine_tune_epochs: int = 10,
+                 **kwargs):
         test_batch_size = test_batch_size or 4096
 
         self.build_model = partial(
             NN, input_size=input_size, num_tasks=1,
             batch_size=test_batch_size, dropout=dropout,
-            uncertainty='dropout', model_seed=model_seed
+            uncertainty='dropout', model_seed=model_seed,
+            fine_tune_epochs=fine_tune_epochs
         )
         self.model = self.build_model()
         self.dropout_size = dropout_size
@@ -493,11 +519,12 @@ class NNDropoutModel(Model):
         return {'means', 'vars', 'stochastic'}
 
     def train(self, xs: Iterable[T], ys: Sequence[Optional[float]], *,
-              featurizer: Featurizer, retrain: bool = False) -> bool:
+              featurizer: Featurizer, retrain: bool = False,
+              warm_start: bool = False) -> bool:
         if retrain:
             self.model = self.build_model()
         
-        return self.model.train(xs, ys, featurizer)
+        return self.model.train(xs, ys, featurizer, warm_start)
 
     def get_means(self, xs: Sequence) -> ndarray:
         predss = self._get_predss(xs)
@@ -1,11 +1,13 @@
 from main.molpal.molpal.pools.base import MoleculePool, EagerMoleculePool
 from main.molpal.molpal.pools.lazypool import LazyMoleculePool
+from main.molpal.molpal.pools.mmappool import MemmapMoleculePool
 
 def pool(pool: str, *args, **kwargs):
     try:
         return {
             'eager': MoleculePool,
-            'lazy': LazyMoleculePool
+            'lazy': LazyMoleculePool,
+            'memmap': MemmapMoleculePool
         }[pool](*args, **kwargs)
     except KeyError:
         print(f'WARNING: Unrecognized pool type: "{pool}". Defaulting to EagerMoleculePool.')
@@ -3,9 +3,10 @@ from collections import Counter
 from functools import partial
 import gzip
 from itertools import islice, repeat
+import os
 import re
 from pathlib import Path
-from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 import h5py
 import numpy as np
@@ -15,6 +16,7 @@ from tqdm import tqdm
 
 from main.molpal.molpal.featurizer import Featurizer
 from main.molpal.molpal.pools import cluster, fingerprints
+from main.molpal.molpal.pools.smiles_store import SmilesStore
 from main.molpal.molpal.utils import batches
 
 RDLogger.DisableLog("rdApp.*")
@@ -60,6 +62,9 @@ class MoleculePool(Sequence):
         for each pool member
     smis_ : Optional[List[str]]
         a list of SMILES strings in the pool. None if no caching
+    smis_store_ : Optional[SmilesStore]
+        a memory-mapped column store of the SMILES strings in the pool with a
+        hash index for lookups. None if not built
     cluster_ids_ : Optional[List[int]]
         the cluster ID for each molecule in the molecule. None if not clustered
     cluster_sizes : Dict[int, int]
@@ -87,6 +92,12 @@ class MoleculePool(Sequence):
         the featurizer to use when calculating fingerprints
     cache : bool, default=False
         whether to cache the SMILES strings in memory
+    smiles_store : bool, default=False
+        whether to keep the SMILES strings in an on-disk column store, so that
+        iterating over the pool doesn't re-parse the library files and
+        membership and index lookups take constant time. The store is written
+        next to the fingerprints file and reused while the libraries are
+        unchanged, so that location must be writable
     validated : bool, default=False
         whether the pool has been validated already. If True, the user
         accepts the risk of an invalid molecule raising an exception later
@@ -115,6 +126,7 @@ class MoleculePool(Sequence):
         fps: Optional[str] = None,
         featurizer: Featurizer = Featurizer(),
         cache: bool = False,
+        smiles_store: bool = False,
         invalid_idxs: Optional[Iterable[int]] = None,
         cluster: bool = False,
         ncluster: int = 100,
@@ -137,6 +149,7 @@ class MoleculePool(Sequence):
         self.verbose = verbose
 
         self.smis_ = None
+        self.smis_store_ = None
         self.fps_ = fps
 
         self.invalid_idxs = set(invalid_idxs) if invalid_idxs is not None else None
@@ -144,6 +157,8 @@ class MoleculePool(Sequence):
         self.chunk_size = None
         self._encode_mols(featurizer, fps_path)
         self._validate_and_cache_smis(cache)
+        if smiles_store:
+            self._build_smiles_store(fps_path)
 
         self.cluster_ids_ = None
         self.cluster_sizes = None
@@ -163,6 +178,9 @@ class MoleculePool(Sequence):
         return zip(self.smis(), self.fps(), self.cluster_ids() or repeat(None))
 
     def __contains__(self, smi: str) -> bool:
+        if self.smis_store_ is not None:
+            return smi in self.smis_store_
+
         if self.smis_ is not None:
             return smi in set(self.smis_)
 
@@ -217,8 +235,35 @@ class MoleculePool(Sequence):
         if self.smis_:
             return self.smis_[idx]
 
+        if self.smis_store_ is not None:
+            return self.smis_store_[idx]
+
         return next(islice(self.smis(), idx, idx + 1))
 
+    def get_idx(self, smi: str) -> Optional[int]:
+        """Get the first pool index of a SMILES string, or None if it isn't in the pool
+
+        Constant time with a SMILES store, otherwise a linear scan of the pool
+        """
+        if self.smis_store_ is not None:
+            return self.smis_store_.index(smi)
+
+        for i, smi_ in enumerate(self.smis()):
+            if smi_ == smi:
+                return i
+
+        return None
+
+    def get_idxs(self, smi: str) -> List[int]:
+        """Get every pool index of a SMILES string, as a pool may contain duplicates
+
+        Constant time with a SMILES store, otherwise a linear scan of the pool
+        """
+        if self.smis_store_ is not None:
+            return self.smis_store_.indices(smi)
+
+        return [i for i, smi_ in enumerate(self.smis()) if smi_ == smi]
+
     def get_fp(self, idx: int) -> np.ndarray:
         if idx < 0 or idx >= len(self):
             raise IndexError(f"pool index(={idx}) out of range")
@@ -259,9 +304,11 @@ class MoleculePool(Sequence):
         if min(idxs) < 0 or max(idxs) >= len(self):
             raise IndexError(f"Pool index out of range: {idxs}")
 
-        if self.smis:
+        if self.smis_:
             idxs = sorted(idxs)
             smis = [self.smis_[i] for i in sorted(idxs)]
+        elif self.smis_store_ is not None:
+            smis = self.smis_store_.get(sorted(idxs))
         else:
             idxs = set(idxs)
             smis = [smi for i, smi in enumerate(self.smis()) if i in idxs]
@@ -287,6 +334,32 @@ class MoleculePool(Sequence):
 
             return fps[idxs]
 
+    def range_reader(
+        self, smiles: bool = False
+    ) -> Optional[Callable[[int, int], Sequence]]:
+        """A picklable function that reads the inputs in the index range
+        [start, stop) of the pool straight from disk, so that shards of the
+        pool can be read independently in other processes
+
+        Parameters
+        ----------
+        smiles : bool, default=False
+            whether to read SMILES strings rather than feature representations
+
+        Returns
+        -------
+        Optional[Callable[[int, int], Sequence]]
+            a function of (start, stop). None if the inputs can't be read by
+            index range from disk
+        """
+        if smiles:
+            if self.smis_store_ is None:
+                return None
+
+            return partial(read_smis_range, self.smis_store_.path)
+
+        return partial(read_fps_range, self.fps_)
+
     def get_cluster_ids(self, idxs: Sequence[int]) -> Optional[List[int]]:
         """Get the cluster_ids for the given indices, if the pool is
         clustered. Otherwise, return None
@@ -318,6 +391,9 @@ class MoleculePool(Sequence):
         if self.smis_:
             for smi in self.smis_:
                 yield smi
+        elif self.smis_store_ is not None:
+            for smi in self.smis_store_:
+                yield smi
         else:
             for library in self.libraries:
                 if self.cxsmiles:
@@ -515,6 +591,47 @@ class MoleculePool(Sequence):
             if self.verbose > 1:
                 print(f"Detected {len(self.invalid_idxs)} invalid SMILES")
 
+    def _build_smiles_store(self, path: Optional[str] = None) -> None:
+        """Open the SMILES store of the pool, writing it first if there is no
+        store for the current libraries and parsing parameters
+
+        Parameters
+        ----------
+        path : Optional[str], default=None
+            the path under which the store should be written. By default, the
+            directory of the first library file
+
+        Side effects
+        ------------
+        (sets) self.smis_store_ : SmilesStore
+        """
+        filename = Path(self.libraries[0])
+        while filename.suffix:
+            filename = filename.with_suffix("")
+        path = Path(path or Path(self.libraries[0]).parent) / f"{filename.stem}.smis"
+
+        meta = {
+            "libraries": [str(Path(library).absolute()) for library in self.libraries],
+            "mtimes": [os.path.getmtime(library) for library in self.libraries],
+            "title_line": self.title_line,
+            "delimiter": self.delimiter,
+            "smiles_col": self.smiles_col,
+            "cxsmiles": self.cxsmiles,
+            "n_invalid": len(self.invalid_idxs or []),
+            "size": self.size,
+        }
+        if SmilesStore.exists(path, meta):
+            if self.verbose > 0:
+                print(f'Using SMILES store "{path}"', flush=True)
+        else:
+            if self.verbose > 0:
+                print("Writing SMILES store ...", end=" ", flush=True)
+            SmilesStore.build(self.smis(), path, meta)
+            if self.verbose > 0:
+                print("Done!", flush=True)
+
+        self.smis_store_ = SmilesStore(path)
+
     def _cluster_mols(self, ncluster: int) -> None:
         """Cluster the molecules in the library.
 
@@ -534,6 +651,18 @@ class MoleculePool(Sequence):
         self.cluster_sizes = Counter(self.cluster_ids_)
 
 
+def read_fps_range(fps_h5: str, start: int, stop: int) -> np.ndarray:
+    """Read the feature representations at indices [start, stop) of an HDF5
+    feature matrix"""
+    with h5py.File(fps_h5, "r") as h5f:
+        return h5f["fps"][start:stop]
+
+
+def read_smis_range(store_path: Union[str, Path], start: int, stop: int) -> List[str]:
+    """Read the SMILES strings at indices [start, stop) of a SmilesStore"""
+    return SmilesStore(store_path).get_range(start, stop)
+
+
 @ray.remote
 def _validate_smis(smis):
     RDLogger.DisableLog("rdApp.*")
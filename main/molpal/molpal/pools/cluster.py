@@ -1,7 +1,7 @@
 from itertools import chain
 from random import sample
 import timeit
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 import h5py
 import numpy as np
@@ -21,6 +21,31 @@ def cluster_fps_h5(fps_h5: str, ncluster: int = 100) -> List[int]:
     ncluster : int (Default = 100)
         the number of clusters to generate
 
+    Returns
+    -------
+    cluster_ids : List[int]
+        the cluster id corresponding to a given fingerprint
+    """
+    with h5py.File(fps_h5, "r") as h5f:
+        return cluster_fps_matrix(h5f["fps"], ncluster=ncluster)
+
+
+def cluster_fps_matrix(
+    fps, ncluster: int = 100, transform: Optional[Callable] = None
+) -> List[int]:
+    """Cluster the inputs represented by a feature matrix that supports
+    len() and (fancy) row indexing, e.g., an HDF5 dataset or a memory map
+
+    Parameters
+    ----------
+    fps
+        the feature matrix of the molecules
+    ncluster : int (Default = 100)
+        the number of clusters to generate
+    transform : Optional[Callable] (Default = None)
+        a function applied to each batch of rows before clustering, e.g., to
+        unpack bit-packed fingerprints
+
     Returns
     -------
     cluster_ids : List[int]
@@ -30,20 +55,18 @@ def cluster_fps_h5(fps_h5: str, ncluster: int = 100) -> List[int]:
 
     BATCH_SIZE = 1024
     n_iter = 1000
+    transform = transform or (lambda X: X)
 
     clusterer = cluster.MiniBatchKMeans(ncluster, batch_size=BATCH_SIZE)
 
-    with h5py.File(fps_h5, "r") as h5f:
-        fps = h5f["fps"]
-
-        for _ in range(n_iter):
-            idxs = sorted(sample(range(len(fps)), BATCH_SIZE))
-            clusterer.partial_fit(fps[idxs])
+    for _ in range(n_iter):
+        idxs = sorted(sample(range(len(fps)), BATCH_SIZE))
+        clusterer.partial_fit(transform(fps[idxs]))
 
-        cluster_ids = [
-            clusterer.predict(fps[i : i + BATCH_SIZE])
-            for i in range(0, len(fps), BATCH_SIZE)
-        ]
+    cluster_ids = [
+        clusterer.predict(transform(fps[i : i + BATCH_SIZE]))
+        for i in range(0, len(fps), BATCH_SIZE)
+    ]
 
     elapsed = timeit.default_timer() - begin
     print(f"Clustering took: {elapsed:0.3f}s")
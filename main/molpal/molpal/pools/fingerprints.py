@@ -1,7 +1,9 @@
+import os
 from pathlib import Path
 from typing import Iterable, Set, Tuple, TypeVar
 
 import h5py
+import numpy as np
 import ray
 from tqdm import tqdm
 
@@ -90,3 +92,83 @@ def feature_matrix_hdf5(
             fps_dset.resize(valid_size, axis=0)
 
     return fps_h5, invalid_idxs
+
+
+def feature_matrix_memmap(
+    smis: Iterable[str],
+    size: int,
+    *,
+    featurizer: Featurizer = Featurizer(),
+    name: str = "fps.fps",
+    path: str = "."
+) -> Tuple[str, Set[int]]:
+    """Precalculate the feature matrix of xs with the given featurizer and store
+    it bit-packed in a raw memory-mapped file
+
+    Row i of the file holds the np.packbits of the i-th valid fingerprint, so each
+    row is ceil(len(featurizer) / 8) bytes. Fingerprints are written a whole
+    featurization batch at a time.
+
+    Parameters
+    ----------
+    smis: Iterable[str]
+        the inputs for which to generate the feature matrix
+    size : int
+        the length of the iterable
+    featurizer : Featurizer, default=Featurizer()
+        an object that encodes inputs from an identifier representation to
+        a feature representation
+    name : str (Default = 'fps.fps')
+        the name of the output file with or without the extension
+    path : str (Default = '.')
+        the path under which the file should be written
+
+    Returns
+    -------
+    fps_file : str
+        the filename of the raw file containing the bit-packed feature matrix.
+        The row ordering corresponds to the ordering of smis
+    invalid_idxs : Set[int]
+        the set of indices in xs containing invalid inputs
+    """
+    fps_file = str((Path(path) / name).with_suffix(".fps"))
+    row_bytes = packed_row_bytes(len(featurizer))
+
+    ncpu = int(ray.cluster_resources()["CPU"])
+    batch_size = 1024 * ncpu
+    n_batches = size // batch_size + 1
+
+    fps_mm = np.memmap(fps_file, dtype=np.uint8, mode="w+", shape=(max(size, 1), row_bytes))
+    invalid_idxs = set()
+    i = 0
+    offset = 0
+
+    for smis_batch in tqdm(
+        batches(smis, batch_size),
+        "Precalculating fps",
+        n_batches,
+        unit="batch",
+    ):
+        fps = feature_matrix(smis_batch, featurizer, disable=True)
+        valid_fps = []
+        for j, fp in enumerate(fps):
+            if fp is None:
+                invalid_idxs.add(offset + j)
+            else:
+                valid_fps.append(fp)
+        offset += len(fps)
+
+        if valid_fps:
+            fps_mm[i : i + len(valid_fps)] = np.packbits(np.stack(valid_fps) != 0, axis=1)
+            i += len(valid_fps)
+
+    fps_mm.flush()
+    del fps_mm
+    os.truncate(fps_file, i * row_bytes)
+
+    return fps_file, invalid_idxs
+
+
+def packed_row_bytes(length: int) -> int:
+    """the number of bytes in a bit-packed fingerprint of the given length"""
+    return (length + 7) // 8
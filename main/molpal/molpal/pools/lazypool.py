@@ -1,10 +1,11 @@
-from typing import Iterator, Optional, Sequence
+from functools import partial
+from typing import Callable, Iterator, Optional, Sequence
 
 import numpy as np
 import ray
 
 from main.molpal.molpal.featurizer import Featurizer, feature_matrix
-from main.molpal.molpal.pools.base import MoleculePool
+from main.molpal.molpal.pools.base import MoleculePool, read_smis_range
 from main.molpal.molpal.utils import batches
 
 
@@ -42,6 +43,14 @@ class LazyMoleculePool(MoleculePool):
         for smis in batches(self.smis(), self.chunk_size):
             yield np.array(feature_matrix(smis, self.featurizer, True))
 
+    def range_reader(
+        self, smiles: bool = False
+    ) -> Optional[Callable[[int, int], Sequence]]:
+        if smiles or self.smis_store_ is None:
+            return super().range_reader(smiles)
+
+        return partial(featurize_smis_range, self.smis_store_.path, self.featurizer)
+
     def _encode_mols(self, featurizer: Featurizer, path: Optional[str] = None):
         """Do not precompute any feature representations"""
         self.featurizer = featurizer
@@ -59,3 +68,13 @@ class LazyMoleculePool(MoleculePool):
             "WARNING: Clustering is not possible for a LazyMoleculePool.",
             "No clustering will be performed.",
         )
+
+
+def featurize_smis_range(
+    store_path: str, featurizer: Featurizer, start: int, stop: int
+) -> np.ndarray:
+    """Calculate the feature representations of the SMILES strings at indices
+    [start, stop) of a SmilesStore"""
+    smis = read_smis_range(store_path, start, stop)
+
+    return np.array([featurizer(smi) for smi in smis])
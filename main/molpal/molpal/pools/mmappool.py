@@ -0,0 +1,142 @@
+from collections import Counter
+from functools import partial
+import os
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from main.molpal.molpal.featurizer import Featurizer
+from main.molpal.molpal.pools import cluster, fingerprints
+from main.molpal.molpal.pools.base import MoleculePool
+
+
+class MemmapMoleculePool(MoleculePool):
+    """A MemmapMoleculePool stores the precomputed fingerprints of the pool
+    bit-packed in a raw memory-mapped file instead of an HDF5 file
+
+    Fingerprints are unpacked a whole batch at a time when they are read, so
+    random access and full-pool iteration are limited by I/O bandwidth rather
+    than per-row Python overhead. The packed matrix itself is exposed without
+    copying through packed_fps.
+
+    Attributes (only differences with EagerMoleculePool are shown)
+    ----------
+    fps_ : str
+        the filepath of the raw file containing the bit-packed fingerprint of
+        each pool member, one row of ceil(length / 8) bytes per molecule
+    length : int
+        the length of the uncompressed feature representations
+    chunk_size : int
+        the number of fingerprints in each batch yielded by fps_batches
+    """
+
+    def __init__(self, *args, featurizer: Featurizer = Featurizer(), **kwargs):
+        self.length = len(featurizer)
+        self.packed_fps_ = None
+        super().__init__(*args, featurizer=featurizer, **kwargs)
+
+    @property
+    def packed_fps(self) -> np.ndarray:
+        """a read-only memory map of the bit-packed feature matrix"""
+        if self.packed_fps_ is None:
+            row_bytes = fingerprints.packed_row_bytes(self.length)
+            n_rows = os.path.getsize(self.fps_) // row_bytes
+            if n_rows == 0:
+                self.packed_fps_ = np.zeros((0, row_bytes), dtype=np.uint8)
+            else:
+                self.packed_fps_ = np.memmap(
+                    self.fps_, dtype=np.uint8, mode="r", shape=(n_rows, row_bytes)
+                )
+
+        return self.packed_fps_
+
+    def unpack(self, packed: np.ndarray) -> np.ndarray:
+        """Unpack a batch of bit-packed fingerprints"""
+        return np.unpackbits(packed, axis=1, count=self.length)
+
+    def get_fp(self, idx: int) -> np.ndarray:
+        if idx < 0 or idx >= len(self):
+            raise IndexError(f"pool index(={idx}) out of range")
+
+        return self.unpack(self.packed_fps[idx : idx + 1])[0]
+
+    def get_fps(self, idxs: Sequence[int]) -> np.ndarray:
+        """Get the uncompressed feature representations for the given indices
+
+        NOTE: Returns the list in sorted index order
+        """
+        if min(idxs) < 0 or max(idxs) >= len(self):
+            raise IndexError(f"Pool index out of range: {idxs}")
+
+        return self.unpack(self.packed_fps[np.sort(idxs)])
+
+    def fps(self) -> Iterator[np.ndarray]:
+        for fps_batch in self.fps_batches():
+            for fp in fps_batch:
+                yield fp
+
+    def fps_batches(self) -> Iterator[np.ndarray]:
+        packed_fps = self.packed_fps
+        for i in range(0, len(packed_fps), self.chunk_size):
+            yield self.unpack(packed_fps[i : i + self.chunk_size])
+
+    def range_reader(
+        self, smiles: bool = False
+    ) -> Optional[Callable[[int, int], Sequence]]:
+        if smiles:
+            return super().range_reader(smiles)
+
+        return partial(read_packed_fps_range, self.fps_, self.length)
+
+    def _encode_mols(self, featurizer: Featurizer, path: Optional[str] = None):
+        """Precalculate the bit-packed fingerprints of the library members, if
+        necessary. See MoleculePool._encode_mols"""
+        if self.fps_ is None:
+            if self.verbose > 0:
+                print("Precalculating feature matrix ...", end=" ")
+
+            total_size = sum(1 for _ in self.smis())
+
+            filename = Path(self.libraries[0])
+            while filename.suffix:
+                filename = filename.with_suffix("")
+            path = path or Path(self.libraries[0]).parent
+
+            self.fps_, self.invalid_idxs = fingerprints.feature_matrix_memmap(
+                self.smis(),
+                total_size,
+                featurizer=featurizer,
+                name=filename.stem,
+                path=path,
+            )
+            if self.verbose > 0:
+                print("Done!")
+                print(f'Feature matrix was saved to "{self.fps_}"', flush=True)
+                print(f"Detected {len(self.invalid_idxs)} invalid SMILES!")
+        else:
+            if self.verbose > 0:
+                print(f'Using feature matrix from "{self.fps_}"', flush=True)
+
+        self.packed_fps_ = None
+        self.size = len(self.packed_fps)
+        # unpacked batches of 2^14 fingerprints are 32MB at length 2048
+        self.chunk_size = 16384
+
+    def _cluster_mols(self, ncluster: int) -> None:
+        """Cluster the molecules in the library. See MoleculePool._cluster_mols"""
+        self.cluster_ids_ = cluster.cluster_fps_matrix(
+            self.packed_fps, ncluster=ncluster, transform=self.unpack
+        )
+        self.cluster_sizes = Counter(self.cluster_ids_)
+
+
+def read_packed_fps_range(fps: str, length: int, start: int, stop: int) -> np.ndarray:
+    """Read and unpack the fingerprints at indices [start, stop) of a raw
+    bit-packed feature matrix"""
+    row_bytes = fingerprints.packed_row_bytes(length)
+    packed = np.memmap(
+        fps, dtype=np.uint8, mode="r", offset=start * row_bytes, shape=(stop - start, row_bytes)
+    )
+
+    return np.unpackbits(packed, axis=1, count=length)
@@ -0,0 +1,157 @@
+"""A SmilesStore is an on-disk column of SMILES strings with a hash index for
+constant-time membership and index lookups"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from main.molpal.molpal.utils import batches
+
+
+def smiles_hash(smi: Union[str, bytes]) -> int:
+    """a 64-bit hash of a SMILES string that is stable across processes"""
+    if isinstance(smi, str):
+        smi = smi.encode()
+    return int.from_bytes(hashlib.blake2b(smi, digest_size=8).digest(), "little")
+
+
+class SmilesStore:
+    """A SmilesStore holds the SMILES strings of a pool as a contiguous byte
+    blob and an array of offsets, both memory-mapped, along with a sorted
+    array of SMILES hashes for lookups
+
+    Attributes
+    ----------
+    path : Path
+        the directory containing the store
+    offsets : np.ndarray
+        the byte offset of each SMILES string in the blob, plus the total length
+    blob : np.ndarray
+        the concatenated utf-8 encoded SMILES strings
+    hashes : np.ndarray
+        the sorted hashes of the SMILES strings
+    order : np.ndarray
+        the pool index of each entry in hashes
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        the directory of a store written by SmilesStore.build
+    """
+
+    BATCH_SIZE = 1 << 16
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.meta = json.load(open(self.path / "meta.json"))
+
+        self.offsets = np.load(self.path / "offsets.npy", mmap_mode="r")
+        self.hashes = np.load(self.path / "hashes.npy", mmap_mode="r")
+        self.order = np.load(self.path / "order.npy", mmap_mode="r")
+        if self.offsets[-1] > 0:
+            self.blob = np.memmap(self.path / "smis.bin", dtype=np.uint8, mode="r")
+        else:
+            self.blob = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        return bytes(self.blob[self.offsets[idx] : self.offsets[idx + 1]]).decode()
+
+    def __iter__(self) -> Iterator[str]:
+        """Decode the SMILES strings a batch at a time"""
+        for i in range(0, len(self), self.BATCH_SIZE):
+            for smi in self.get_range(i, min(i + self.BATCH_SIZE, len(self))):
+                yield smi
+
+    def __contains__(self, smi: str) -> bool:
+        return self.index(smi) is not None
+
+    def get_range(self, start: int, stop: int) -> List[str]:
+        """Get the SMILES strings at indices [start, stop)"""
+        offsets = self.offsets[start : stop + 1] - self.offsets[start]
+        text = bytes(self.blob[self.offsets[start] : self.offsets[stop]]).decode()
+        if len(text) != offsets[-1]:
+            # offsets count bytes, so non-ASCII strings are decoded one by one
+            return [self[i] for i in range(start, stop)]
+
+        return [text[offsets[i] : offsets[i + 1]] for i in range(stop - start)]
+
+    def get(self, idxs: Sequence[int]) -> List[str]:
+        return [self[i] for i in idxs]
+
+    def index(self, smi: str) -> Optional[int]:
+        """Get the first pool index of a SMILES string, or None if it isn't in the pool"""
+        idxs = self.indices(smi)
+
+        return idxs[0] if idxs else None
+
+    def indices(self, smi: str) -> List[int]:
+        """Get every pool index of a SMILES string, in ascending order"""
+        h = np.uint64(smiles_hash(smi))
+        lo = np.searchsorted(self.hashes, h, "left")
+        hi = np.searchsorted(self.hashes, h, "right")
+
+        # the stable sort in build keeps entries with equal hashes in pool order
+        return [int(i) for i in self.order[lo:hi] if self[int(i)] == smi]
+
+    @staticmethod
+    def exists(path: Union[str, Path], meta: Optional[dict] = None) -> bool:
+        """Whether a complete store exists at path (with matching metadata, if given)"""
+        p_meta = Path(path) / "meta.json"
+        if not p_meta.exists():
+            return False
+
+        return meta is None or json.load(open(p_meta)) == meta
+
+    @classmethod
+    def build(
+        cls, smis: Iterable[str], path: Union[str, Path], meta: Optional[dict] = None
+    ) -> "SmilesStore":
+        """Write the SMILES strings to a store under path in a single streaming pass
+
+        Parameters
+        ----------
+        smis : Iterable[str]
+            the SMILES strings in pool order
+        path : Union[str, Path]
+            the directory under which to write the store
+        meta : Optional[dict] (Default = None)
+            JSON-serializable metadata identifying the source of the SMILES strings
+
+        Returns
+        -------
+        SmilesStore
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        p_meta = path / "meta.json"
+        if p_meta.exists():
+            os.remove(p_meta)
+
+        lengths = []
+        hashes = []
+        with open(path / "smis.bin", "wb") as fid:
+            for smis_batch in batches(smis, cls.BATCH_SIZE):
+                encoded = [smi.encode() for smi in smis_batch]
+                fid.write(b"".join(encoded))
+                lengths.append(np.fromiter(map(len, encoded), np.int64, len(encoded)))
+                hashes.append(np.fromiter(map(smiles_hash, encoded), np.uint64, len(encoded)))
+
+        lengths = np.concatenate(lengths) if lengths else np.zeros(0, np.int64)
+        hashes = np.concatenate(hashes) if hashes else np.zeros(0, np.uint64)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        order = np.argsort(hashes, kind="stable")
+
+        np.save(path / "offsets.npy", offsets)
+        np.save(path / "hashes.npy", hashes[order])
+        np.save(path / "order.npy", order)
+        # written last, so its presence marks a complete store
+        json.dump(meta or {}, open(p_meta, "w"), indent=4)
+
+        return cls(path)
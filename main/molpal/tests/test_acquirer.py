@@ -94,6 +94,42 @@ def test_aquire_batch_epsilon(acq, xs, Y_mean, Y_var, epsilon):
         assert batch_xs_0 == batch_xs_1
     else:
         assert batch_xs_0 != batch_xs_1
+
+
+def test_acquire_batch_idxs(acq, xs, Y_mean, Y_var):
+    batch_xs = acq.acquire_batch(xs, Y_mean, Y_var, {})
+    idxs = acq.acquire_batch_idxs(Y_mean, Y_var)
+
+    assert len(idxs) == acq.batch_sizes[0]
+    assert set(np.array(xs)[idxs]) == set(batch_xs)
+
+
+def test_acquire_batch_idxs_explored(acq, xs, Y_mean, Y_var):
+    init_idxs = acq.acquire_initial_idxs()
+    explored_mask = np.zeros(len(xs), dtype=bool)
+    explored_mask[init_idxs] = True
+
+    idxs = acq.acquire_batch_idxs(Y_mean, Y_var, explored_mask, Y_mean[init_idxs])
+
+    assert len(idxs) == min(acq.batch_sizes[0], len(xs) - len(init_idxs))
+    assert not explored_mask[idxs].any()
+
+
+def test_acquire_batch_idxs_clustered(acq, xs, Y_mean, Y_var):
+    cluster_ids = np.arange(len(xs)) % 3
+    cluster_sizes = {cid: int((cluster_ids == cid).sum()) for cid in range(3)}
+
+    idxs = acq.acquire_batch_idxs(
+        Y_mean, Y_var, cluster_ids=cluster_ids, cluster_sizes=cluster_sizes
+    )
+
+    for cid, size in cluster_sizes.items():
+        cluster_idxs = idxs[cluster_ids[idxs] == cid]
+        top = np.sort(Y_mean[cluster_ids == cid])[::-1][:len(cluster_idxs)]
+        assert len(cluster_idxs) == np.ceil(acq.batch_sizes[0] * size / len(xs))
+        assert np.allclose(np.sort(Y_mean[cluster_idxs])[::-1], top)
+
+
 #     def test_acquire_batch_epsilon(self):
 #         """There is roughly a  1-in-5*10^6 (= nCr(26, 10)) chance that a random
 #         batch is the same as the calculated top-m batch, causing this test to
@@ -0,0 +1,58 @@
+import random
+import string
+
+import pytest
+
+from molpal.pools.smiles_store import SmilesStore
+
+@pytest.fixture
+def smis():
+    random.seed(0)
+    return [
+        ''.join(random.choices('CNOc1()=', k=random.randint(1, 20))) + str(i)
+        for i in range(1000)
+    ]
+
+@pytest.fixture
+def store(smis, tmp_path):
+    return SmilesStore.build(iter(smis), tmp_path / 'store', {'size': len(smis)})
+
+def test_len(store, smis):
+    assert len(store) == len(smis)
+
+def test_iter(store, smis):
+    assert list(store) == smis
+
+def test_getitem(store, smis):
+    for i in random.sample(range(len(smis)), 50):
+        assert store[i] == smis[i]
+
+def test_index(store, smis):
+    for i in random.sample(range(len(smis)), 50):
+        assert store.index(smis[i]) == i
+
+def test_contains(store, smis):
+    assert smis[0] in store
+    assert 'not a SMILES string' not in store
+
+def test_non_ascii(tmp_path):
+    smis = ['CCO', 'CéC', 'c1ccccc1']
+    store = SmilesStore.build(smis, tmp_path / 'store')
+
+    assert list(store) == smis
+    assert store.index('CéC') == 1
+
+def test_duplicates(tmp_path):
+    smis = ['CCO', 'c1ccccc1', 'CCO', 'CCN', 'CCO']
+    store = SmilesStore.build(smis, tmp_path / 'store')
+
+    assert store.index('CCO') == 0
+    assert store.indices('CCO') == [0, 2, 4]
+    assert store.indices('CCN') == [3]
+    assert store.indices('CCC') == []
+
+def test_exists(store, smis, tmp_path):
+    assert SmilesStore.exists(tmp_path / 'store')
+    assert SmilesStore.exists(tmp_path / 'store', {'size': len(smis)})
+    assert not SmilesStore.exists(tmp_path / 'store', {'size': len(smis) + 1})
+    assert not SmilesStore.exists(tmp_path / 'missing')
@@ -1,13 +1,19 @@
 import os
 import yaml
+import heapq
+import sqlite3
 import random
 import torch
 import numpy as np
+import joblib
 from rdkit import Chem
 from rdkit.Chem import Draw
 import tdc
 from tdc.generation import MolGen
 from main.utils.chem import *
+from main.utils.library import LibraryCache, build_library_cache
+
+PRODUCTION_SEEDS = [0, 1, 2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97]
 
 
 class Objdict(dict):
@@ -27,39 +33,200 @@ class Objdict(dict):
             raise AttributeError("No such attribute: " + name)
 
 
+class TopAUC:
+    """
+    Streaming top-n AUC accumulator consuming scores in oracle-call order.
+
+    Keeps the running best max(top_ns) scores in a heap and folds in a trapezoid at 
+    every freq_log boundary, so querying the AUC costs O(k log k) instead of re-sorting 
+    the buffer prefixes. Values are identical to the batch computation in top_auc.
+    """
+
+    def __init__(self, freq_log, max_oracle_calls, top_ns=(1, 10, 100)):
+        self.freq_log = freq_log
+        self.max_oracle_calls = max_oracle_calls
+        self.top_ns = list(top_ns)
+        self.heap_size = max(self.top_ns)
+        self.heap = []
+        self.n_calls = 0
+        self.called = 0
+        self.sums = {top_n: 0 for top_n in self.top_ns}
+        self.prevs = {top_n: 0 for top_n in self.top_ns}
+
+    def update(self, score):
+        # A boundary only counts once a later molecule exists and it is within the budget
+        if self.n_calls > 0 and self.n_calls % self.freq_log == 0 and self.n_calls < self.max_oracle_calls:
+            scores = sorted(self.heap, reverse=True)
+            for top_n in self.top_ns:
+                top_n_now = np.mean(scores[:top_n])
+                self.sums[top_n] += self.freq_log * (top_n_now + self.prevs[top_n]) / 2
+                self.prevs[top_n] = top_n_now
+            self.called = self.n_calls
+        if len(self.heap) < self.heap_size:
+            heapq.heappush(self.heap, score)
+        else:
+            heapq.heappushpop(self.heap, score)
+        self.n_calls += 1
+
+    def value(self, top_n, finish):
+        top_n_now = np.mean(sorted(self.heap, reverse=True)[:top_n])
+        sum = self.sums[top_n] + (self.n_calls - self.called) * (top_n_now + self.prevs[top_n]) / 2
+        if finish and self.n_calls < self.max_oracle_calls:
+            sum += (self.max_oracle_calls - self.n_calls) * top_n_now
+        return sum / self.max_oracle_calls
+
+    def values(self, finish):
+        return {top_n: self.value(top_n, finish) for top_n in self.top_ns}
+
+
 def top_auc(buffer, top_n, finish, freq_log, max_oracle_calls):
-    sum = 0
-    prev = 0
-    called = 0
-    ordered_results = list(sorted(buffer.items(), key=lambda kv: kv[1][1], reverse=False))
-    for idx in range(freq_log, min(len(buffer), max_oracle_calls), freq_log):
-        temp_result = ordered_results[:idx]
-        temp_result = list(sorted(temp_result, key=lambda kv: kv[1][0], reverse=True))[:top_n]
-        top_n_now = np.mean([item[1][0] for item in temp_result])
-        sum += freq_log * (top_n_now + prev) / 2
-        prev = top_n_now
-        called = idx
-    temp_result = list(sorted(ordered_results, key=lambda kv: kv[1][0], reverse=True))[:top_n]
-    top_n_now = np.mean([item[1][0] for item in temp_result])
-    sum += (len(buffer) - called) * (top_n_now + prev) / 2
-    if finish and len(buffer) < max_oracle_calls:
-        sum += (max_oracle_calls - len(buffer)) * top_n_now
-    return sum / max_oracle_calls
+    auc = TopAUC(freq_log, max_oracle_calls, top_ns=[top_n])
+    for _, (score, _) in sorted(buffer.items(), key=lambda kv: kv[1][1]):
+        auc.update(score)
+    return auc.value(top_n, finish)
+
+
+class ResultLog:
+    """
+    Append-only results file with one "smiles<TAB>score<TAB>call index" line per oracle call.
+
+    Lines are kept in memory and appended to disk in batches by flush, so checkpointing 
+    costs O(new molecules) instead of rewriting the whole buffer. The first flush of a 
+    fresh log overwrites any stale file, a resumed log only appends.
+    """
+
+    def __init__(self, fresh=True):
+        self.pending = []
+        self.fresh = fresh
+
+    def append(self, smi, score, idx):
+        self.pending.append(f'{smi}\t{score!r}\t{idx}\n')
+
+    def flush(self, path):
+        if len(self.pending) == 0 and not self.fresh:
+            return
+        with open(path, 'w' if self.fresh else 'a') as f:
+            f.writelines(self.pending)
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending = []
+        self.fresh = False
+
+    @staticmethod
+    def load(path):
+        """
+        Read a results log back into a mol_buffer dict in oracle-call order.
+
+        A partially written last line (e.g. from a crash during flush) is dropped and 
+        truncated from the file, so the run can keep appending to it.
+        """
+        mol_buffer = {}
+        if not os.path.exists(path):
+            return mol_buffer
+        valid_size = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                smi, score, idx = line.decode().rstrip('\n').split('\t')
+                mol_buffer[smi] = [float(score), int(idx)]
+                valid_size += len(line)
+        if valid_size < os.path.getsize(path):
+            with open(path, 'r+b') as f:
+                f.truncate(valid_size)
+        return mol_buffer
+
+
+def result_log_to_yaml(log_path, yaml_path):
+    """
+    Convert a results log to the legacy results yaml, sorted by score.
+    """
+    mol_buffer_to_yaml(ResultLog.load(log_path), yaml_path)
+
+
+def mol_buffer_to_yaml(mol_buffer, yaml_path):
+    """
+    Write a mol_buffer dict as the legacy results yaml, sorted by score.
+    """
+    mol_buffer = dict(sorted(mol_buffer.items(), key=lambda kv: kv[1][0], reverse=True))
+    with open(yaml_path, 'w') as f:
+        yaml.dump(mol_buffer, f, sort_keys=False)
+
+
+class ScoreCache:
+    """
+    On-disk oracle score cache in SQLite, keyed by (oracle name, canonical SMILES).
+
+    One cache file can be shared by seeds, methods and concurrent processes. The 
+    connection is opened lazily so the cache can be pickled into worker processes.
+    """
+
+    def __init__(self, path, chunk_size=500):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.conn = None
+
+    def connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, timeout=600)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS scores '
+                              '(oracle TEXT, smiles TEXT, score REAL, PRIMARY KEY (oracle, smiles))')
+            self.conn.commit()
+        return self.conn
+
+    def get(self, oracle_name, smis):
+        conn = self.connect()
+        scores = {}
+        for i in range(0, len(smis), self.chunk_size):
+            chunk = smis[i:i+self.chunk_size]
+            rows = conn.execute(
+                'SELECT smiles, score FROM scores WHERE oracle = ? AND smiles IN (%s)' % ','.join('?' * len(chunk)), 
+                [oracle_name] + chunk)
+            scores.update({smi: score for smi, score in rows if score is not None})
+        return scores
+
+    def put(self, oracle_name, scores):
+        conn = self.connect()
+        conn.executemany('INSERT OR IGNORE INTO scores VALUES (?, ?, ?)', 
+                         [(oracle_name, smi, score) for smi, score in scores.items()])
+        conn.commit()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['conn'] = None
+        return state
 
 
 class Oracle:
-    def __init__(self, args=None, mol_buffer={}):
+    def __init__(self, args=None, mol_buffer=None, topk_size=100):
         self.name = None
         self.evaluator = None
         self.task_label = None
+        self.score_cache = None
         if args is None:
             self.max_oracle_calls = 10000
             self.freq_log = 100
+            self.n_jobs = 1
+            self.oracle_backend = 'serial'
         else:
             self.args = args
             self.max_oracle_calls = args.max_oracle_calls
             self.freq_log = args.freq_log
-        self.mol_buffer = mol_buffer
+            self.n_jobs = args.n_jobs
+            self.oracle_backend = getattr(args, 'oracle_backend', 'serial')
+            if getattr(args, 'oracle_cache', None) is not None:
+                self.score_cache = ScoreCache(args.oracle_cache)
+        self.mol_buffer = {} if mol_buffer is None else mol_buffer
+        # Min-heap of (score, -call index, smiles) holding the best topk_size molecules
+        self.topk_size = topk_size
+        self.topk_heap = []
+        for smi in self.mol_buffer:
+            self.push_topk(smi)
+        self.auc = TopAUC(self.freq_log, self.max_oracle_calls)
+        for _, (score, _) in sorted(self.mol_buffer.items(), key=lambda kv: kv[1][1]):
+            self.auc.update(score)
+        self.result_log = ResultLog()
         self.sa_scorer = tdc.Oracle(name = 'SA')
         self.diversity_evaluator = tdc.Evaluator(name = 'Diversity')
         self.last_log = 0
@@ -70,25 +237,52 @@ class Oracle:
 
     def assign_evaluator(self, evaluator):
         self.evaluator = evaluator
+        self.name = getattr(evaluator, 'name', None)
 
     def sort_buffer(self):
         self.mol_buffer = dict(sorted(self.mol_buffer.items(), key=lambda kv: kv[1][0], reverse=True))
 
-    def save_result(self, suffix=None):
-        
+    def push_topk(self, smi):
+        score, idx = self.mol_buffer[smi]
+        if len(self.topk_heap) < self.topk_size:
+            heapq.heappush(self.topk_heap, (score, -idx, smi))
+        else:
+            heapq.heappushpop(self.topk_heap, (score, -idx, smi))
+
+    def topk(self, k=100):
+        """
+        Top-k buffer items (smiles, [score, call index]) ordered by score, ties by call order,
+        the same as list(self.mol_buffer.items())[:k] after sort_buffer.
+        """
+        if k > self.topk_size:
+            return sorted(self.mol_buffer.items(), key=lambda kv: (-kv[1][0], kv[1][1]))[:k]
+        top = sorted(self.topk_heap, key=lambda item: (-item[0], -item[1]))[:k]
+        return [(smi, self.mol_buffer[smi]) for _, _, smi in top]
+
+    def topk_mean(self, k=100):
+        return np.mean([item[1][0] for item in self.topk(k)])
+
+    def result_path(self, suffix=None, ext='.yaml'):
         if suffix is None:
-            output_file_path = os.path.join(self.args.output_dir, 'results.yaml')
+            return os.path.join(self.args.output_dir, 'results' + ext)
         else:
-            output_file_path = os.path.join(self.args.output_dir, 'results_' + suffix + '.yaml')
+            return os.path.join(self.args.output_dir, 'results_' + suffix + ext)
+
+    def flush_result(self, suffix=None):
+        self.result_log.flush(self.result_path(suffix, ext='.log'))
 
-        self.sort_buffer()
-        with open(output_file_path, 'w') as f:
-            yaml.dump(self.mol_buffer, f, sort_keys=False)
+    def save_result(self, suffix=None):
+        if suffix is None or suffix != self.task_label:
+            # The log only lives under the task label, dump the whole buffer from memory
+            mol_buffer_to_yaml(self.mol_buffer, self.result_path(suffix))
+            return
+        self.flush_result(suffix)
+        result_log_to_yaml(self.result_path(suffix, ext='.log'), self.result_path(suffix))
 
     def log_intermediate(self, mols=None, scores=None, finish=False):
 
         if finish:
-            temp_top100 = list(self.mol_buffer.items())[:100]
+            temp_top100 = self.topk(100)
             smis = [item[0] for item in temp_top100]
             scores = [item[1][0] for item in temp_top100]
             n_calls = self.max_oracle_calls
@@ -96,7 +290,7 @@ class Oracle:
             if mols is None and scores is None:
                 if len(self.mol_buffer) <= self.max_oracle_calls:
                     # If not spefcified, log current top-100 mols in buffer
-                    temp_top100 = list(self.mol_buffer.items())[:100]
+                    temp_top100 = self.topk(100)
                     smis = [item[0] for item in temp_top100]
                     scores = [item[1][0] for item in temp_top100]
                     n_calls = len(self.mol_buffer)
@@ -127,14 +321,15 @@ class Oracle:
                 f'avg_sa: {avg_sa:.3f} | '
                 f'div: {diversity_top100:.3f}')
 
+        auc = self.auc.values(finish)
         # try:
         print({
             "avg_top1": avg_top1, 
             "avg_top10": avg_top10, 
             "avg_top100": avg_top100, 
-            "auc_top1": top_auc(self.mol_buffer, 1, finish, self.freq_log, self.max_oracle_calls),
-            "auc_top10": top_auc(self.mol_buffer, 10, finish, self.freq_log, self.max_oracle_calls),
-            "auc_top100": top_auc(self.mol_buffer, 100, finish, self.freq_log, self.max_oracle_calls),
+            "auc_top1": auc[1],
+            "auc_top10": auc[10],
+            "auc_top100": auc[100],
             "avg_sa": avg_sa,
             "diversity_top100": diversity_top100,
             "n_oracle": n_calls,
@@ -144,6 +339,59 @@ class Oracle:
     def __len__(self):
         return len(self.mol_buffer) 
 
+    def canonicalize(self, smi):
+        """
+        Canonicalize one SMILES string the way the buffer keys are stored, None if invalid.
+        """
+        if smi is None:
+            return None
+        mol = Chem.MolFromSmiles(smi)
+        if mol is None or len(smi) == 0:
+            return None
+        return Chem.MolToSmiles(mol)
+
+    def evaluate(self, smis):
+        """
+        Function to score a batch of novel molecules, looking them up in the score cache first
+
+        Argguments:
+            smis: a list of canonical SMILES strings, none of them in the buffer.
+
+        Return:
+            scores: a list of floats, in the same order as smis.
+        """
+        if len(smis) == 0:
+            return []
+        use_cache = self.score_cache is not None and self.name is not None
+        scores = self.score_cache.get(self.name, smis) if use_cache else {}
+        misses = [smi for smi in smis if smi not in scores]
+        if len(misses) > 0:
+            new_scores = dict(zip(misses, self.call_evaluator(misses)))
+            if use_cache:
+                self.score_cache.put(self.name, new_scores)
+            scores.update(new_scores)
+        return [scores[smi] for smi in smis]
+
+    def call_evaluator(self, smis):
+        if self.oracle_backend == 'vectorized':
+            scores = self.evaluator(smis)
+        elif self.oracle_backend in ['thread', 'process'] and len(smis) > 1:
+            prefer = 'threads' if self.oracle_backend == 'thread' else 'processes'
+            pool = joblib.Parallel(n_jobs=self.n_jobs, prefer=prefer)
+            scores = pool(joblib.delayed(self.evaluator)(smi) for smi in smis)
+        else:
+            scores = [self.evaluator(smi) for smi in smis]
+        return [float(score) for score in scores]
+
+    def insert(self, smi, score):
+        """
+        Add a newly scored canonical SMILES to the buffer with its oracle call index.
+        """
+        self.mol_buffer[smi] = [score, len(self.mol_buffer)+1]
+        self.push_topk(smi)
+        self.auc.update(score)
+        self.result_log.append(smi, score, len(self.mol_buffer))
+
     def score_smi(self, smi):
         """
         Function to score one molecule
@@ -156,39 +404,68 @@ class Oracle:
         """
         if len(self.mol_buffer) > self.max_oracle_calls:
             return 0
+        smi = self.canonicalize(smi)
         if smi is None:
             return 0
-        mol = Chem.MolFromSmiles(smi)
-        if mol is None or len(smi) == 0:
-            return 0
-        else:
-            smi = Chem.MolToSmiles(mol)
-            if smi in self.mol_buffer:
-                pass
+        if smi not in self.mol_buffer:
+            self.insert(smi, self.evaluate([smi])[0])
+        return self.mol_buffer[smi][0]
+
+    def score_smiles(self, smiles_lst):
+        """
+        Function to score a list of molecules in one batch
+
+        Canonicalizes the whole list, drops in-batch duplicates and buffer hits, and 
+        sends the remaining novel molecules to the evaluator at once. Budget accounting, 
+        buffer insertion order and logging are the same as calling score_smi one by one.
+
+        Argguments:
+            smiles_lst: a list of SMILES strings.
+
+        Return:
+            score_list: a list of floats, in the same order as smiles_lst.
+        """
+        canon_lst = [self.canonicalize(smi) for smi in smiles_lst]
+
+        # Replay the budget check of score_smi to find the molecules that would be called
+        novel, seen = [], set()
+        n_calls = len(self.mol_buffer)
+        for smi in canon_lst:
+            if n_calls > self.max_oracle_calls:
+                break
+            if smi is None or smi in self.mol_buffer or smi in seen:
+                continue
+            seen.add(smi)
+            novel.append(smi)
+            n_calls += 1
+        novel_scores = dict(zip(novel, self.evaluate(novel)))
+
+        score_list = []
+        for smi in canon_lst:
+            if len(self.mol_buffer) > self.max_oracle_calls or smi is None:
+                score_list.append(0)
             else:
-                self.mol_buffer[smi] = [float(self.evaluator(smi)), len(self.mol_buffer)+1]
-            return self.mol_buffer[smi][0]
+                if smi not in self.mol_buffer:
+                    self.insert(smi, novel_scores[smi])
+                score_list.append(self.mol_buffer[smi][0])
+            self.check_log()
+        return score_list
+
+    def check_log(self):
+        if len(self.mol_buffer) % self.freq_log == 0 and len(self.mol_buffer) > self.last_log:
+            self.log_intermediate()
+            self.last_log = len(self.mol_buffer)
+            self.flush_result(self.task_label)
     
     def __call__(self, smiles_lst):
         """
         Score
         """
         if type(smiles_lst) == list:
-            score_list = []
-            for smi in smiles_lst:
-                score_list.append(self.score_smi(smi))
-                if len(self.mol_buffer) % self.freq_log == 0 and len(self.mol_buffer) > self.last_log:
-                    self.sort_buffer()
-                    self.log_intermediate()
-                    self.last_log = len(self.mol_buffer)
-                    self.save_result(self.task_label)
+            score_list = self.score_smiles(smiles_lst)
         else:  ### a string of SMILES 
             score_list = self.score_smi(smiles_lst)
-            if len(self.mol_buffer) % self.freq_log == 0 and len(self.mol_buffer) > self.last_log:
-                self.sort_buffer()
-                self.log_intermediate()
-                self.last_log = len(self.mol_buffer)
-                self.save_result(self.task_label)
+            self.check_log()
         return score_list
 
     @property
@@ -196,6 +473,65 @@ class Oracle:
         return len(self.mol_buffer) >= self.max_oracle_calls
 
 
+_zinc_smiles = None
+
+def load_zinc_smiles():
+    """
+    ZINC starting library, loaded once per process and shared by all optimizers.
+
+    Loading it in the parent before forking workers lets them share it copy-on-write. 
+    Returns a shallow copy since some optimizers shuffle their library in place.
+    """
+    global _zinc_smiles
+    if _zinc_smiles is None:
+        data = MolGen(name = 'ZINC')
+        _zinc_smiles = data.get_data()['smiles'].tolist()
+    return list(_zinc_smiles)
+
+
+def load_smiles_from_file(file_name, n_jobs=-1):
+    """
+    Canonical SMILES of a file with one molecule per line, dropping blank and invalid lines.
+    """
+    with open(file_name) as f:
+        smiles = joblib.Parallel(n_jobs=n_jobs)(joblib.delayed(canonicalize)(s.strip()) for s in f)
+    return [s for s in smiles if s is not None]
+
+
+def library_source(smi_file=None):
+    """
+    Identifies a starting library, so a library cache is only reused for the library it was built from.
+    """
+    if smi_file is None:
+        return {'name': 'ZINC'}
+    stat = os.stat(smi_file)
+    return {'path': os.path.abspath(smi_file), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def load_starting_smiles(smi_file=None, library_cache=None, n_jobs=-1):
+    """
+    Starting library of an optimizer: the --smi_file molecules or ZINC.
+
+    With a library_cache directory the library is canonicalized and validated
+    once into memory-mapped arrays (see main.utils.library), and later runs only decode them. 
+    A cache built from another library is rebuilt.
+    """
+    if library_cache is not None:
+        source = library_source(smi_file)
+        if not LibraryCache.exists(library_cache, source):
+            if smi_file is not None:
+                with open(smi_file) as f:
+                    smiles = [s.strip() for s in f]
+            else:
+                smiles = load_zinc_smiles()
+            build_library_cache(smiles, library_cache, n_jobs=n_jobs, source=source)
+        return LibraryCache(library_cache).smiles()
+    elif smi_file is not None:
+        return load_smiles_from_file(smi_file, n_jobs=n_jobs)
+    else:
+        return load_zinc_smiles()
+
+
 class BaseOptimizer:
 
     def __init__(self, args=None):
@@ -204,20 +540,23 @@ class BaseOptimizer:
         self.n_jobs = args.n_jobs
         # self.pool = joblib.Parallel(n_jobs=self.n_jobs)
         self.smi_file = args.smi_file
+        self.library_cache = getattr(args, 'library_cache', None)
         self.oracle = Oracle(args=self.args)
-        if self.smi_file is not None:
-            self.all_smiles = self.load_smiles_from_file(self.smi_file)
-        else:
-            data = MolGen(name = 'ZINC')
-            self.all_smiles = data.get_data()['smiles'].tolist()
+        self._all_smiles = None
             
         self.sa_scorer = tdc.Oracle(name = 'SA')
         self.diversity_evaluator = tdc.Evaluator(name = 'Diversity')
         self.filter = tdc.chem_utils.oracle.filter.MolFilter(filters = ['PAINS', 'SureChEMBL', 'Glaxo'], property_filters_flag = False)
 
-    # def load_smiles_from_file(self, file_name):
-    #     with open(file_name) as f:
-    #         return self.pool(delayed(canonicalize)(s.strip()) for s in f)
+    @property
+    def all_smiles(self):
+        # Loaded on first use, so optimizers that never read the library skip it
+        if self._all_smiles is None:
+            self._all_smiles = load_starting_smiles(self.smi_file, self.library_cache, self.n_jobs)
+        return self._all_smiles
+
+    def load_smiles_from_file(self, file_name):
+        return load_smiles_from_file(file_name, n_jobs=self.n_jobs)
             
     def sanitize(self, mol_list):
         new_mol_list = []
@@ -235,6 +574,12 @@ class BaseOptimizer:
         
     def sort_buffer(self):
         self.oracle.sort_buffer()
+
+    def topk(self, k=100):
+        return self.oracle.topk(k)
+
+    def topk_mean(self, k=100):
+        return self.oracle.topk_mean(k)
     
     def log_intermediate(self, mols=None, scores=None, finish=False):
         self.oracle.log_intermediate(mols=mols, scores=scores, finish=finish)
@@ -264,15 +609,7 @@ class BaseOptimizer:
     def save_result(self, suffix=None):
 
         print(f"Saving molecules...")
-        
-        if suffix is None:
-            output_file_path = os.path.join(self.args.output_dir, 'results.yaml')
-        else:
-            output_file_path = os.path.join(self.args.output_dir, 'results_' + suffix + '.yaml')
-
-        self.sort_buffer()
-        with open(output_file_path, 'w') as f:
-            yaml.dump(self.mol_buffer, f, sort_keys=False)
+        self.oracle.save_result(suffix)
     
     def _analyze_results(self, results):
         results = results[:100]
@@ -321,7 +658,7 @@ class BaseOptimizer:
                     torch.manual_seed(seed)
                     random.seed(seed)
                     self._optimize(oracle, config)
-                    auc_top10s.append(top_auc(self.oracle.mol_buffer, 10, True, self.oracle.freq_log, self.oracle.max_oracle_calls))
+                    auc_top10s.append(self.oracle.auc.value(10, True))
                     self.reset()
                 avg_auc += np.mean(auc_top10s)
             print({"avg_auc": avg_auc})
@@ -333,7 +670,15 @@ class BaseOptimizer:
         torch.manual_seed(seed)
         random.seed(seed)
         self.seed = seed 
-        self.oracle.task_label = self.model_name + "_" + oracle.name + "_" + str(seed)
+        task_label = self.model_name + "_" + oracle.name + "_" + str(seed)
+        log_path = self.oracle.result_path(task_label, ext='.log')
+        if getattr(self.args, 'resume', False) and os.path.exists(log_path):
+            # Continue from the molecules already scored by an interrupted run
+            self.oracle = Oracle(args=self.args, mol_buffer=ResultLog.load(log_path))
+            self.oracle.result_log.fresh = False
+            self.oracle.last_log = len(self.oracle)
+            print(f'Resuming {task_label} from {len(self.oracle)} logged oracle calls')
+        self.oracle.task_label = task_label
         self._optimize(oracle, config)
         if self.args.log_results:
             self.log_result()
@@ -342,7 +687,7 @@ class BaseOptimizer:
 
 
     def production(self, oracle, config, num_runs=5, project="production"):
-        seeds = [0, 1, 2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97]
+        seeds = PRODUCTION_SEEDS
         # seeds = [23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97]
         if num_runs > len(seeds):
             raise ValueError(f"Current implementation only allows at most {len(seeds)} runs.")
@@ -503,8 +503,7 @@ class Pasithea_Optimizer(BaseOptimizer):
         while True:
 
             if len(self.oracle) > 100:
-                self.sort_buffer()
-                old_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+                old_scores = [item[1][0] for item in self.topk(100)]
             else:
                 old_scores = 0
         
@@ -543,8 +542,7 @@ class Pasithea_Optimizer(BaseOptimizer):
 
             # early stopping
             if len(self.oracle) > 100:
-                self.sort_buffer()
-                new_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+                new_scores = [item[1][0] for item in self.topk(100)]
                 if new_scores == old_scores:
                     patience += 1
                     if patience >= self.args.patience:
@@ -1,9 +1,13 @@
 #!/usr/bin/env python
 
+from functools import partial
+
 import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+from torch.func import functional_call
+from torch.nn.utils.rnn import pack_padded_sequence
 from utils import Variable
 
 class MultiGRU(nn.Module):
@@ -19,12 +23,53 @@ class MultiGRU(nn.Module):
 
     def forward(self, x, h):
         x = self.embedding(x)
-        h_out = Variable(torch.zeros(h.size()))
-        x = h_out[0] = self.gru_1(x, h[0])
-        x = h_out[1] = self.gru_2(x, h[1])
-        x = h_out[2] = self.gru_3(x, h[2])
+        h_1 = self.gru_1(x, h[0])
+        h_2 = self.gru_2(h_1, h[1])
+        h_3 = self.gru_3(h_2, h[2])
+        x = self.linear(h_3)
+        return x, torch.stack((h_1, h_2, h_3))
+
+    def forward_sequence(self, x, lengths):
+        """ Runs the three GRU layers over whole sequences at once.
+
+            The sequences are packed, so no work is spent past the end of
+            each one. Without gradients (and on the GPU) they go through a
+            three layer nn.GRU that uses the weights of the GRU cells. The
+            backward pass of its fused kernel is slow on the CPU, so there
+            the cells are stepped over the shrinking batch of unfinished
+            sequences instead. Either way the result is the same as stepping
+            forward() over each sequence.
+
+            Args:
+                x: (batch_size * seq_length) A batch of input tokens
+                lengths: (batch_size) The length of each sequence
+
+            Outputs:
+                logits: (sum(lengths) * voc_size) The logits of each step, in
+                        the order of pack_padded_sequence(x, lengths, True, False)
+        """
+        x = pack_padded_sequence(self.embedding(x), lengths.cpu(), batch_first=True, enforce_sorted=False)
+        grus = (self.gru_1, self.gru_2, self.gru_3)
+        if x.data.requires_grad and not x.data.is_cuda:
+            h = [x.data.new_zeros(int(x.batch_sizes[0]), 512)] * 3
+            outputs = []
+            for step_input in torch.split(x.data, x.batch_sizes.tolist()):
+                n = step_input.size(0)
+                for i, gru in enumerate(grus):
+                    step_input = h[i] = gru(step_input, h[i][:n])
+                outputs.append(step_input)
+            x = torch.cat(outputs)
+        else:
+            # The nn.GRU is built on the meta device, so it holds no weights of its
+            # own and the checkpoint format stays that of the GRU cells
+            gru = nn.GRU(128, 512, num_layers=3, device='meta')
+            weights = {'%s_l%d' % (name, i): getattr(cell, name)
+                       for i, cell in enumerate(grus)
+                       for name in ('weight_ih', 'weight_hh', 'bias_ih', 'bias_hh')}
+            x, _ = functional_call(gru, weights, (x, self.init_h(len(lengths))))
+            x = x.data
         x = self.linear(x)
-        return x, h_out
+        return x
 
     def init_h(self, batch_size):
         # Initial cell state is zero
@@ -56,16 +101,21 @@ class RNN():
         start_token = Variable(torch.zeros(batch_size, 1).long())
         start_token[:] = self.voc.vocab['GO']
         x = torch.cat((start_token, target[:, :-1]), 1)
-        h = self.rnn.init_h(batch_size)
 
-        log_probs = Variable(torch.zeros(batch_size).float())
-        entropy = Variable(torch.zeros(batch_size))
-        for step in range(seq_length):
-            logits, h = self.rnn(x[:, step], h)
-            log_prob = F.log_softmax(logits)
-            prob = F.softmax(logits)
-            log_probs += NLLLoss(log_prob, target[:, step])
-            entropy += -torch.sum((log_prob * prob), 1)
+        # Steps after the first EOS are not part of the SMILES and are skipped
+        is_eos = target == self.voc.vocab['EOS']
+        lengths = torch.where(is_eos.any(1), is_eos.long().argmax(1) + 1, seq_length)
+        pack = partial(pack_padded_sequence, lengths=lengths.cpu(), batch_first=True, enforce_sorted=False)
+        logits = self.rnn.forward_sequence(x, lengths)
+        log_prob = F.log_softmax(logits, dim=1)
+        prob = torch.exp(log_prob)
+
+        targets = pack(target).data
+        owners = pack(torch.arange(batch_size, device=target.device).expand(seq_length, batch_size).t()).data
+        log_probs = torch.zeros(batch_size, device=target.device).index_add(
+            0, owners, log_prob.gather(1, targets.view(-1, 1)).view(-1))
+        entropy = torch.zeros(batch_size, device=target.device).index_add(
+            0, owners, -torch.sum((log_prob * prob), 1))
         return log_probs, entropy
 
     def sample(self, batch_size, max_length=140):
@@ -82,43 +132,34 @@ class RNN():
             entropy: (batch_size) The entropies for the sequences. Not
                                     currently used.
         """
-        start_token = Variable(torch.zeros(batch_size).long())
-        start_token[:] = self.voc.vocab['GO']
+        eos = self.voc.vocab['EOS']
+        x = Variable(torch.full((batch_size,), self.voc.vocab['GO'], dtype=torch.long))
         h = self.rnn.init_h(batch_size)
-        x = start_token
 
-        sequences = []
+        # Steps after EOS are not part of the SMILES, so finished sequences are
+        # dropped from the batch and their remaining steps are left as EOS
+        sequences = Variable(torch.full((batch_size, max_length), eos, dtype=torch.long))
         log_probs = Variable(torch.zeros(batch_size))
-        finished = torch.zeros(batch_size).byte()
         entropy = Variable(torch.zeros(batch_size))
-        if torch.cuda.is_available():
-            finished = finished.cuda()
-
-        # for step in range(max_length):
-        #     logits, h = self.rnn(x, h)
-        #     prob = F.softmax(logits)
-        #     log_prob = F.log_softmax(logits)
-        #     x = torch.multinomial(prob).view(-1)
-        #     sequences.append(x.view(-1, 1))
-        #     log_probs +=  NLLLoss(log_prob, x)
-        #     entropy += -torch.sum((log_prob * prob), 1)
+        active = Variable(torch.arange(batch_size))
 
         for step in range(max_length):
             logits, h = self.rnn(x, h)
-            # print('logits shape', logits.shape) ##### [128, 109]
-            prob = F.softmax(logits, dim = 1)
-            log_prob = F.log_softmax(logits, dim = 1)
+            log_prob = F.log_softmax(logits, dim=1)
+            prob = torch.exp(log_prob)
             x = torch.multinomial(prob, num_samples=1).view(-1)
-            sequences.append(x.view(-1, 1))
-            log_probs +=  NLLLoss(log_prob, x)
-            entropy += -torch.sum((log_prob * prob), 1)
-
-            x = Variable(x.data)
-            EOS_sampled = (x == self.voc.vocab['EOS']).data
-            finished = torch.ge(finished + EOS_sampled, 1)
-            if torch.prod(finished) == 1: break
-
-        sequences = torch.cat(sequences, 1)
+            sequences[active, step] = x
+            log_probs.index_add_(0, active, NLLLoss(log_prob, x))
+            entropy.index_add_(0, active, -torch.sum((log_prob * prob), 1))
+
+            unfinished = x != eos
+            if not unfinished.all():
+                if not unfinished.any(): break
+                active = active[unfinished]
+                x = x[unfinished]
+                h = h[:, unfinished]
+
+        sequences = sequences[:, :step + 1]
         return sequences.data, log_probs, entropy
 
 def NLLLoss(inputs, targets):
@@ -134,12 +175,5 @@ def NLLLoss(inputs, targets):
             loss : (batch_size) *Loss for each example*
     """
 
-    if torch.cuda.is_available():
-        target_expanded = torch.zeros(inputs.size()).cuda()
-    else:
-        target_expanded = torch.zeros(inputs.size())
-
-    target_expanded.scatter_(1, targets.contiguous().view(-1, 1).data, 1.0)
-    loss = Variable(target_expanded) * inputs
-    loss = torch.sum(loss, 1)
+    loss = inputs.gather(1, targets.contiguous().view(-1, 1)).view(-1)
     return loss
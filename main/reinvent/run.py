@@ -58,8 +58,7 @@ class REINVENT_Optimizer(BaseOptimizer):
         while True:
 
             if len(self.oracle) > 100:
-                self.sort_buffer()
-                old_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+                old_scores = [item[1][0] for item in self.topk(100)]
             else:
                 old_scores = 0
             
@@ -73,7 +72,8 @@ class REINVENT_Optimizer(BaseOptimizer):
             entropy = entropy[unique_idxs]
 
             # Get prior likelihood and score
-            prior_likelihood, _ = Prior.likelihood(Variable(seqs))
+            with torch.no_grad():
+                prior_likelihood, _ = Prior.likelihood(Variable(seqs))
             smiles = seq_to_smiles(seqs, voc)
             score = np.array(self.oracle(smiles))
 
@@ -83,8 +83,7 @@ class REINVENT_Optimizer(BaseOptimizer):
 
             # early stopping
             if len(self.oracle) > 1000:
-                self.sort_buffer()
-                new_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+                new_scores = [item[1][0] for item in self.topk(100)]
                 if new_scores == old_scores:
                     patience += 1
                     if patience >= self.args.patience:
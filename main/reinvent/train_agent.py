@@ -77,7 +77,8 @@ def train_agent(restore_prior_from='data/Prior.ckpt',
         entropy = entropy[unique_idxs]
 
         # Get prior likelihood and score
-        prior_likelihood, _ = Prior.likelihood(Variable(seqs))
+        with torch.no_grad():
+            prior_likelihood, _ = Prior.likelihood(Variable(seqs))
         smiles = seq_to_smiles(seqs, voc)
         score = np.array(scoring_function(smiles))
         # score = scoring_function(smiles)
@@ -46,8 +46,7 @@ class AHC_Optimizer(BaseOptimizer):
         while (not self.finish) and (not converge):
 
             if len(self.oracle) > 100:
-                self.sort_buffer()
-                old_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+                old_scores = [item[1][0] for item in self.topk(100)]
             else:
                 old_scores = 0
 
@@ -86,8 +85,7 @@ class AHC_Optimizer(BaseOptimizer):
 
             # early stopping
             if len(self.oracle) > 1000:
-                self.sort_buffer()
-                new_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+                new_scores = [item[1][0] for item in self.topk(100)]
                 if new_scores == old_scores:
                     patience += 1
                     if patience >= config['patience']:
@@ -36,8 +36,7 @@ class AugmentedMemory_Optimizer(BaseOptimizer):
         patience = 0
         while True:
             if len(self.oracle) > 100:
-                self.sort_buffer()
-                old_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+                old_scores = [item[1][0] for item in self.topk(100)]
             else:
                 old_scores = 0
 
@@ -96,8 +95,7 @@ class AugmentedMemory_Optimizer(BaseOptimizer):
 
             # early stopping
             if len(self.oracle) > 1000:
-                self.sort_buffer()
-                new_scores = [item[1][0] for item in list(self.mol_buffer.items())[:100]]
+                new_scores = [item[1][0] for item in self.topk(100)]
                 if new_scores == old_scores:
                     patience += 1
                     if patience >= self.args.patience:
@@ -29,18 +29,16 @@ def get_smiles_tokenizer(cfg):
     return tokenize
 
 
+_tokenize = get_smiles_tokenizer(smiles_grammar.GCFG)
+_parser = nltk.ChartParser(smiles_grammar.GCFG)
+_prod_map = {prod: ix for ix, prod in enumerate(smiles_grammar.GCFG.productions())}
+
+
 def encode(smiles):
-    GCFG = smiles_grammar.GCFG
-    tokenize = get_smiles_tokenizer(GCFG)
-    tokens = tokenize(smiles)
-    parser = nltk.ChartParser(GCFG)
-    parse_tree = parser.parse(tokens).__next__()
+    tokens = _tokenize(smiles)
+    parse_tree = _parser.parse(tokens).__next__()
     productions_seq = parse_tree.productions()
-    productions = GCFG.productions()
-    prod_map = {}
-    for ix, prod in enumerate(productions):
-        prod_map[prod] = ix
-    indices = np.array([prod_map[prod] for prod in productions_seq], dtype=int)
+    indices = np.array([_prod_map[prod] for prod in productions_seq], dtype=int)
     return indices
 
 
@@ -63,3 +61,84 @@ def decode(rule):
     productions = smiles_grammar.GCFG.productions()
     prod_seq = [productions[i] for i in rule]
     return prods_to_eq(prod_seq)
+
+
+class CompiledGrammar:
+    """
+    Integer-coded tables of a CFG for fast conversion between genes and SMILES.
+
+    Nonterminals are numbered in order of first appearance as a lhs, each of
+    them indexes the tuple of production rules with that lhs, and each rule
+    maps to its position in that tuple and to its rhs, reversed for pushing
+    onto a stack (nonterminals as ints, terminals as strings).
+    """
+
+    def __init__(self, cfg):
+        productions = cfg.productions()
+        nonterminals = {}
+        for prod in productions:
+            nonterminals.setdefault(prod.lhs(), len(nonterminals))
+
+        self.start = nonterminals[productions[0].lhs()]
+        lhs_rules = [[] for _ in nonterminals]
+        self.rule_pos = np.zeros(len(productions), dtype=int)
+        self.rhs = []
+        for ix, prod in enumerate(productions):
+            rules = lhs_rules[nonterminals[prod.lhs()]]
+            self.rule_pos[ix] = len(rules)
+            rules.append(ix)
+            self.rhs.append(tuple(
+                nonterminals[a] if isinstance(a, nltk.grammar.Nonterminal) else a
+                for a in reversed(prod.rhs())
+                if not (isinstance(a, nltk.grammar.Nonterminal) and str(a) == 'None')
+            ))
+        self.lhs_rules = [(tuple(rules), len(rules)) for rules in lhs_rules]
+
+    def gene_to_rules(self, gene):
+        """
+        The leftmost derivation selected by a gene, one rule per gene position
+        until no nonterminals are left.
+        """
+        rules = []
+        stack = [self.start]
+        for g in gene:
+            if not stack:
+                break
+            choices, n = self.lhs_rules[stack.pop()]
+            rule = choices[g % n]
+            rules.append(rule)
+            stack.extend(a for a in self.rhs[rule] if type(a) is int)
+        return rules
+
+    def rules_to_gene(self, rules):
+        return [int(self.rule_pos[r]) for r in rules]
+
+    def decode_gene(self, gene):
+        """
+        The SMILES string derived from a gene, or '' if the gene runs out before
+        the derivation is complete. Same as decode(gene_to_rules(gene)).
+        """
+        out = []
+        stack = [self.start]
+        i, n_genes = 0, len(gene)
+        while stack:
+            a = stack.pop()
+            if type(a) is str:
+                out.append(a)
+                continue
+            if i == n_genes:
+                return ''
+            choices, n = self.lhs_rules[a]
+            stack.extend(self.rhs[choices[gene[i] % n]])
+            i += 1
+        return ''.join(out)
+
+    def decode_genes(self, genes):
+        """
+        Decode a batch of genes, given as a 2D int array or a list of genes.
+        """
+        genes = np.asarray(genes).tolist()
+        return [self.decode_gene(gene) for gene in genes]
+
+
+GRAMMAR = CompiledGrammar(smiles_grammar.GCFG)
@@ -39,12 +39,7 @@ def canonicalize(smiles: str, include_stereocenters=True) -> Optional[str]:
 
 
 def cfg_to_gene(prod_rules, max_len=-1):
-    gene = []
-    for r in prod_rules:
-        lhs = GCFG.productions()[r].lhs()
-        possible_rules = [idx for idx, rule in enumerate(GCFG.productions())
-                          if rule.lhs() == lhs]
-        gene.append(possible_rules.index(r))
+    gene = cfg_util.GRAMMAR.rules_to_gene(prod_rules)
     if max_len > 0:
         if len(gene) > max_len:
             gene = gene[:max_len]
@@ -55,21 +50,7 @@ def cfg_to_gene(prod_rules, max_len=-1):
 
 
 def gene_to_cfg(gene):
-    prod_rules = []
-    stack = [GCFG.productions()[0].lhs()]
-    for g in gene:
-        try:
-            lhs = stack.pop()
-        except Exception:
-            break
-        possible_rules = [idx for idx, rule in enumerate(GCFG.productions())
-                          if rule.lhs() == lhs]
-        rule = possible_rules[g % len(possible_rules)]
-        prod_rules.append(rule)
-        rhs = filter(lambda a: (type(a) == nltk.grammar.Nonterminal) and (str(a) != 'None'),
-                     smiles_grammar.GCFG.productions()[rule].rhs())
-        stack.extend(list(rhs)[::-1])
-    return prod_rules
+    return cfg_util.GRAMMAR.gene_to_rules(gene)
 
 
 def select_parent(population, tournament_size=3):
@@ -100,12 +81,6 @@ def deduplicate(population):
     return good_population
 
 
-def mutate(p_gene):
-    c_gene = mutation(p_gene)
-    c_smiles = canonicalize(cfg_util.decode(gene_to_cfg(c_gene)))
-    return c_smiles, c_gene
-
-
 
 class SMILES_GA_Optimizer(BaseOptimizer):
 
@@ -145,9 +120,12 @@ class SMILES_GA_Optimizer(BaseOptimizer):
             choice_indices = np.random.choice(len(all_genes), config["n_mutations"], replace=True)
             genes_to_mutate = [all_genes[i] for i in choice_indices]
 
-            # evolve genes
-            joblist = (delayed(mutate)(g) for g in genes_to_mutate)
-            new_population = pool(joblist)
+            # evolve genes. Decoding them is cheap, so only canonicalization is
+            # dispatched to the workers
+            new_genes = [mutation(g) for g in genes_to_mutate]
+            new_smiles = cfg_util.GRAMMAR.decode_genes(new_genes)
+            new_smiles = pool(delayed(canonicalize)(s) for s in new_smiles)
+            new_population = list(zip(new_smiles, new_genes))
 
             # join and dedup
             population += new_population
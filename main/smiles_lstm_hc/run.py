@@ -73,8 +73,7 @@ class SMILES_LSTM_HC_Optimizer(BaseOptimizer):
         while True:
 
             if len(self.oracle) > 50:
-                self.sort_buffer()
-                old_scores = [item[1][0] for item in list(self.mol_buffer.items())[:50]]
+                old_scores = [item[1][0] for item in self.topk(50)]
             else:
                 old_scores = 0
 
@@ -118,8 +117,7 @@ class SMILES_LSTM_HC_Optimizer(BaseOptimizer):
                 
             # early stopping
             if len(self.oracle) > 50:
-                self.sort_buffer()
-                new_scores = [item[1][0] for item in list(self.mol_buffer.items())[:50]]
+                new_scores = [item[1][0] for item in self.topk(50)]
                 if new_scores == old_scores:
                     patience += 1
                     if patience >= self.args.patience:
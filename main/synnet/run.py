@@ -167,8 +167,7 @@ class SynNet_Optimizer(BaseOptimizer):
             n += 1
 
             if len(self.oracle) > 100:
-                self.sort_buffer()
-                old_score = np.mean([item[1][0] for item in list(self.mol_buffer.items())[:100]])
+                old_score = self.topk_mean(100)
             else:
                 old_score = 0
 
@@ -221,8 +220,7 @@ class SynNet_Optimizer(BaseOptimizer):
                 del recent_scores[0]
 
             if len(self.oracle) > 100:
-                self.sort_buffer()
-                new_score = np.mean([item[1][0] for item in list(self.mol_buffer.items())[:100]])
+                new_score = self.topk_mean(100)
                 if (new_score - old_score) < 1e-3:
                     patience += 1
                     if patience >= self.args.patience:
@@ -0,0 +1,109 @@
+import os
+import yaml
+import numpy as np
+import joblib
+from rdkit import Chem
+
+
+def _canonicalize(smiles: str):
+    """
+    Canonicalize one SMILES string.
+    Returns:
+        (canonical SMILES or the input if invalid, validity flag)
+    """
+    mol = Chem.MolFromSmiles(smiles) if len(smiles) > 0 else None
+    if mol is None:
+        return smiles, False
+    return Chem.MolToSmiles(mol), True
+
+
+def build_library_cache(smiles_list, path, n_jobs=-1, source=None):
+    """
+    One-time preprocessing of a starting library into a directory of memory-mappable arrays:
+    canonical SMILES (offsets + utf-8 blob) and validity flags.
+    Args:
+        smiles_list: molecules as SMILES strings
+        path: output directory
+        n_jobs: number of joblib workers for canonicalization
+        source: YAML-serializable description of where the library comes from, see LibraryCache.exists
+    """
+    os.makedirs(path, exist_ok=True)
+    meta_file = os.path.join(path, 'meta.yaml')
+    if os.path.exists(meta_file):
+        os.remove(meta_file)
+    smiles_list = [s.strip() for s in smiles_list]
+    results = joblib.Parallel(n_jobs=n_jobs, batch_size=1024)(
+        joblib.delayed(_canonicalize)(s) for s in smiles_list)
+
+    encoded = [smi.encode() for smi, _ in results]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    valid = np.array([v for _, v in results], dtype=bool)
+
+    np.save(os.path.join(path, 'offsets.npy'), offsets)
+    np.save(os.path.join(path, 'smiles.npy'), blob)
+    np.save(os.path.join(path, 'valid.npy'), valid)
+    # Written last, so its presence marks a complete cache
+    with open(meta_file, 'w') as f:
+        yaml.dump({'size': len(encoded), 'source': source}, f)
+
+
+class LibraryCache:
+    """
+    Read-only view of a library built by build_library_cache. Arrays are opened lazily as
+    memory maps, so concurrent runs share the same pages.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._arrays = {}
+
+    @staticmethod
+    def exists(path, source=None):
+        """
+        Whether a complete cache exists at path, built from the given source if one is given.
+        """
+        meta_file = os.path.join(path, 'meta.yaml')
+        if not os.path.exists(meta_file):
+            return False
+        if source is None:
+            return True
+        with open(meta_file) as f:
+            return yaml.safe_load(f).get('source') == source
+
+    def _array(self, name):
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.path, name + '.npy'), mmap_mode='r')
+        return self._arrays[name]
+
+    @property
+    def valid(self):
+        return self._array('valid')
+
+    def __len__(self):
+        return len(self._array('offsets')) - 1
+
+    def __getitem__(self, idx):
+        offsets = self._array('offsets')
+        return bytes(self._array('smiles')[offsets[idx]:offsets[idx+1]]).decode()
+
+    def smiles(self, valid_only=True):
+        """
+        Decode the stored canonical SMILES.
+        Args:
+            valid_only: skip molecules RDKit failed to parse
+        Returns:
+            A list of SMILES strings in library order.
+        """
+        offsets = self._array('offsets')
+        text = bytes(self._array('smiles')).decode()
+        # Offsets are byte positions; the library is ASCII SMILES in practice, fall back otherwise
+        if len(text) != offsets[-1]:
+            smis = [self[i] for i in range(len(self))]
+        else:
+            smis = [text[offsets[i]:offsets[i+1]] for i in range(len(self))]
+        if valid_only:
+            valid = self.valid
+            smis = [smi for smi, v in zip(smis, valid) if v]
+        return smis
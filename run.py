@@ -4,19 +4,115 @@ import argparse
 import yaml
 import os
 import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 sys.path.append(os.path.realpath(__file__))
 from tdc import Oracle
 from time import time 
 
+
+def run_job(job):
+    """
+    Run one (method, oracle, seed) job of the parallel scheduler in a worker process
+    and summarize its results log.
+    """
+    import torch
+    import numpy as np
+    from threadpoolctl import threadpool_limits
+    from main.optimizer import ResultLog, top_auc
+
+    Optimizer, args, oracle_name, seed, config = job
+    # The BLAS/OpenMP runtimes were initialized in the parent before forking, so the
+    # *_NUM_THREADS variables no longer apply to them: limit their pools directly
+    torch.set_num_threads(args.threads_per_job)
+    start_time = time()
+
+    with threadpool_limits(limits=args.threads_per_job):
+        oracle = Oracle(name = oracle_name)
+        optimizer = Optimizer(args=args)
+        optimizer.optimize(oracle=oracle, config=config, seed=seed)
+
+    task_label = optimizer.model_name + "_" + oracle.name + "_" + str(seed)
+    mol_buffer = ResultLog.load(os.path.join(args.output_dir, 'results_' + task_label + '.log'))
+    scores = sorted([item[0] for item in mol_buffer.values()], reverse=True)
+    return {
+        "method": args.method, 
+        "oracle": oracle_name, 
+        "seed": seed, 
+        "avg_top1": float(np.max(scores)), 
+        "avg_top10": float(np.mean(scores[:10])), 
+        "avg_top100": float(np.mean(scores[:100])), 
+        "auc_top10": float(top_auc(mol_buffer, 10, True, args.freq_log, args.max_oracle_calls)), 
+        "n_oracle": len(mol_buffer), 
+        "hours": (time() - start_time) / 3600.0, 
+    }
+
+
+def schedule(Optimizer, args, config):
+    """
+    Fan out (method, oracle, seed) jobs over a local process pool of args.n_workers workers,
+    each limited to args.threads_per_job threads, and collect one summary.
+    Failed jobs are recorded in the summary with their error.
+    Returns:
+        the summary and the number of failed jobs
+    """
+    from main.optimizer import PRODUCTION_SEEDS, load_starting_smiles
+
+    if args.task == "production":
+        if args.n_runs > len(PRODUCTION_SEEDS):
+            raise ValueError(f"Current implementation only allows at most {len(PRODUCTION_SEEDS)} runs.")
+        seeds = PRODUCTION_SEEDS[:args.n_runs]
+    else:
+        seeds = args.seed
+
+    # Load read-only resources before forking so workers share them copy-on-write
+    load_starting_smiles(args.smi_file, args.library_cache, args.n_jobs)
+    args.n_jobs = args.threads_per_job
+    # For processes the jobs start themselves, e.g. joblib workers
+    for var in ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS']:
+        os.environ[var] = str(args.threads_per_job)
+
+    jobs = [(Optimizer, args, oracle_name, seed, config) for oracle_name in args.oracles for seed in seeds]
+    print(f'Scheduling {len(jobs)} jobs on {args.n_workers} workers with {args.threads_per_job} threads each')
+
+    summary = []
+    n_failed = 0
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=args.n_workers, mp_context=context) as pool:
+        futures = {pool.submit(run_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            _, _, oracle_name, seed, _ = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f'Job {oracle_name} seed {seed} failed: {e!r}')
+                summary.append({"method": args.method, "oracle": oracle_name, "seed": seed, "failed": True, "error": repr(e)})
+                n_failed += 1
+                continue
+            print(f'Finished {oracle_name} seed {seed} | '
+                  f'avg_top10: {result["avg_top10"]:.3f} | '
+                  f'auc_top10: {result["auc_top10"]:.3f} | '
+                  f'{result["hours"]:.2f} hours')
+            summary.append(result)
+
+    summary = sorted(summary, key=lambda r: (r["oracle"], r["seed"]))
+    with open(os.path.join(args.output_dir, 'summary_' + args.method + '.yaml'), 'w') as f:
+        yaml.dump(summary, f, sort_keys=False)
+    return summary, n_failed
+
+
 def main():
     start_time = time() 
     parser = argparse.ArgumentParser()
     parser.add_argument('method', default='graph_ga')
     parser.add_argument('--smi_file', default=None)
+    parser.add_argument('--library_cache', default=None, help='Directory of the preprocessed starting library, built on first use')
     parser.add_argument('--config_default', default='hparams_default.yaml')
     parser.add_argument('--config_tune', default='hparams_tune.yaml')
     parser.add_argument('--pickle_directory', help='Directory containing pickle files with the distribution statistics', default=None)
     parser.add_argument('--n_jobs', type=int, default=-1)
+    parser.add_argument('--oracle_cache', type=str, default=None, help='SQLite file caching oracle scores across runs; hits still count against the budget')
+    parser.add_argument('--oracle_backend', type=str, default='serial', choices=['serial', 'vectorized', 'thread', 'process'], help='How novel molecules in a batch are sent to the oracle')
     parser.add_argument('--output_dir', type=str, default=None)
     parser.add_argument('--patience', type=int, default=5)
     parser.add_argument('--max_oracle_calls', type=int, default=10000)
@@ -28,6 +124,9 @@ def main():
     parser.add_argument('--oracles', nargs="+", default=["QED"]) ### 
     parser.add_argument('--log_results', action='store_true')
     parser.add_argument('--log_code', action='store_true')
+    parser.add_argument('--n_workers', type=int, default=1, help='Run (oracle, seed) jobs in parallel over this many processes')
+    parser.add_argument('--threads_per_job', type=int, default=1, help='CPU threads allotted to each parallel job')
+    parser.add_argument('--resume', action='store_true', help='Continue runs from their results_*.log files in output_dir')
     args = parser.parse_args()
 
 
@@ -123,7 +222,18 @@ def main():
     if args.pickle_directory is None:
         args.pickle_directory = path_main
 
-    if args.task != "tune":
+    if args.task != "tune" and args.n_workers > 1:
+
+        try:
+            config_default = yaml.safe_load(open(args.config_default))
+        except:
+            config_default = yaml.safe_load(open(os.path.join(path_main, args.config_default)))
+
+        _, n_failed = schedule(Optimizer, args, config_default)
+        if n_failed > 0:
+            sys.exit(f'{n_failed} job(s) failed, see summary_{args.method}.yaml')
+
+    elif args.task != "tune":
     
         for oracle_name in args.oracles:
 